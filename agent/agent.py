@@ -16,6 +16,9 @@ from datetime import datetime, timedelta
 # Load environment variables
 load_dotenv()
 
+# Agent step tracing goes to stdout - keep it off unless debugging
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "false").lower() == "true"
+
 # Initialize services
 llm = ChatOpenAI(model="gpt-4o-mini", api_key=os.getenv("OPENAI_API_KEY"))
 viator = ViatorService()
@@ -585,16 +588,16 @@ tools = [
 ]
 
 agent = create_tool_calling_agent(llm, tools, prompt)
-default_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+default_executor = AgentExecutor(agent=agent, tools=tools, verbose=AGENT_VERBOSE)
 
 
 def create_executor_with_memory(session_id: str = None) -> AgentExecutor:
     """Create an executor with Django-based memory for a specific session."""
     if session_id:
         memory = DjangoConversationMemory(session_id=session_id, max_history_length=5)
-        return AgentExecutor(agent=agent, tools=tools, verbose=True, memory=memory)
+        return AgentExecutor(agent=agent, tools=tools, verbose=AGENT_VERBOSE, memory=memory)
     else:
         memory = ConversationBufferWindowMemory(memory_key="chat_history", return_messages=True, k=5)
-        return AgentExecutor(agent=agent, tools=tools, verbose=True, memory=memory)
+        return AgentExecutor(agent=agent, tools=tools, verbose=AGENT_VERBOSE, memory=memory)
 
 executor = default_executor
\ No newline at end of file
@@ -0,0 +1,22 @@
+# agent/cache_serializers.py
+"""
+msgpack serializer for django-redis (used by the default cache)
+"""
+
+import msgpack
+from django_redis.serializers.base import BaseSerializer
+from rest_framework.encoders import JSONEncoder
+
+# Cached values are API payloads, so anything msgpack can't pack (dates, Decimal, UUID...)
+# is stored the way the JSON renderer would send it anyway
+_drf_default = JSONEncoder().default
+
+
+class MsgpackSerializer(BaseSerializer):
+    """Smaller and faster than pickle for the JSON-shaped responses ChatView caches"""
+
+    def dumps(self, value) -> bytes:
+        return msgpack.packb(value, default=_drf_default, use_bin_type=True)
+
+    def loads(self, value: bytes):
+        return msgpack.unpackb(value, raw=False)
@@ -0,0 +1,24 @@
+# Indexes are built CONCURRENTLY so webhook/booking writes aren't blocked during deploy
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('agent', '0004_payment_webhooklog_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='flightbooking',
+            index=models.Index(fields=['payment_status', 'expires_at'], name='booking_pending_expiry_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='webhooklog',
+            index=models.Index(condition=models.Q(('processed', False)), fields=['received_at'], name='unproc_webhook_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Built CONCURRENTLY so chat writes aren't blocked during deploy
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('agent', '0005_flightbooking_pending_expiry_webhooklog_unprocessed_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='conversation',
+            index=models.Index(fields=['-updated_at'], name='conversation_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Trigram index for conversation search (content__icontains), built CONCURRENTLY
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations
+from django.db.models.functions import Upper
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('agent', '0006_conversation_recent_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='message',
+            index=GinIndex(OpClass(Upper('content'), name='gin_trgm_ops'), name='message_content_trgm_idx'),
+        ),
+    ]
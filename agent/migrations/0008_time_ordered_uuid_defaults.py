@@ -0,0 +1,29 @@
+# New primary keys are UUIDv7 (time-ordered); default-only change, no schema SQL
+
+import agent.utils.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('agent', '0007_message_content_trgm_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='flightbooking',
+            name='booking_id',
+            field=models.UUIDField(default=agent.utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='payment_id',
+            field=models.UUIDField(default=agent.utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='webhooklog',
+            name='webhook_id',
+            field=models.UUIDField(default=agent.utils.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
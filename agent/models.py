@@ -1,9 +1,11 @@
 # agent/models.py - ENHANCED WITH PAYMENT FIELDS
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
-import uuid
+from agent.utils.ids import uuid7
 
 
 class Conversation(models.Model):
@@ -16,6 +18,10 @@ class Conversation(models.Model):
     
     class Meta:
         ordering = ['-updated_at']
+        indexes = [
+            # Conversation list: newest first, LIMIT N
+            models.Index(fields=['-updated_at'], name='conversation_recent_idx'),
+        ]
     
     def __str__(self):
         return self.title or f"Conversation {self.session_id[:8]}"
@@ -42,6 +48,11 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Trigram index on UPPER(content) - the expression Postgres icontains compares -
+            # so conversation search is an index scan instead of reading every message
+            GinIndex(OpClass(Upper('content'), name='gin_trgm_ops'), name='message_content_trgm_idx'),
+        ]
     
     def __str__(self):
         return f"{self.message_type}: {self.content[:50]}..."
@@ -101,7 +112,7 @@ class FlightBooking(models.Model):
     ]
     
     # Identifiers
-    booking_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    booking_id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     
     # User and session
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -175,6 +186,7 @@ class FlightBooking(models.Model):
             models.Index(fields=['payment_status']),
             models.Index(fields=['payment_intent_id']),
             models.Index(fields=['expires_at']),
+            models.Index(fields=['payment_status', 'expires_at'], name='booking_pending_expiry_idx'),
         ]
     
     def __str__(self):
@@ -197,21 +209,21 @@ class FlightBooking(models.Model):
             not self.is_expired()
         )
     
-    def mark_as_paid(self, transaction_id: str, payment_method: str = None):
-        """Mark booking as paid"""
+    def mark_as_paid(self, transaction_id: str, payment_method: str = None, paid_at=None, extra_fields=()):
+        """Mark booking as paid (extra_fields: other changed fields to persist in the same UPDATE)"""
         self.payment_status = 'PAID'
         self.transaction_id = transaction_id
-        self.paid_at = timezone.now()
+        self.paid_at = paid_at or timezone.now()
         if payment_method:
             self.payment_method = payment_method
-        self.save()
+        self.save(update_fields=['payment_status', 'transaction_id', 'paid_at', 'payment_method', 'updated_at', *extra_fields])
     
-    def mark_as_ticketed(self, ticket_numbers: list):
-        """Mark booking as ticketed"""
+    def mark_as_ticketed(self, ticket_numbers: list, extra_fields=()):
+        """Mark booking as ticketed (extra_fields: other changed fields to persist in the same UPDATE)"""
         self.ticket_status = 'ISSUED'
         self.ticket_numbers = ticket_numbers
         self.ticketed_at = timezone.now()
-        self.save()
+        self.save(update_fields=['ticket_status', 'ticket_numbers', 'ticketed_at', 'updated_at', *extra_fields])
     
     def is_round_trip(self):
         """Check if this is a round-trip booking"""
@@ -234,7 +246,7 @@ class Payment(models.Model):
     ]
     
     # Identifiers
-    payment_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    payment_id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     booking = models.ForeignKey(FlightBooking, on_delete=models.CASCADE, related_name='payment_attempts')
     
     # Monei details
@@ -274,7 +286,7 @@ class WebhookLog(models.Model):
     """Log all webhook events for debugging and idempotency"""
     
     # Identifiers
-    webhook_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    webhook_id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     booking = models.ForeignKey(FlightBooking, on_delete=models.SET_NULL, null=True, blank=True, related_name='webhook_logs')
     
     # Webhook details
@@ -298,6 +310,8 @@ class WebhookLog(models.Model):
         indexes = [
             models.Index(fields=['monei_event_id']),
             models.Index(fields=['processed']),
+            # Partial - only the (small) unprocessed backlog is indexed
+            models.Index(fields=['received_at'], condition=models.Q(processed=False), name='unproc_webhook_idx'),
         ]
     
     def __str__(self):
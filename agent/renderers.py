@@ -0,0 +1,21 @@
+# agent/renderers.py
+"""
+DRF renderer backed by orjson (used for every API response)
+"""
+
+import orjson
+from rest_framework.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+# Fallback for types orjson doesn't know (Decimal, lazy translation strings, querysets...)
+_drf_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Same output as JSONRenderer, encoded by orjson instead of the stdlib encoder"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # OPT_UTC_Z: UTC datetimes end in 'Z' like DRF's encoder, not orjson's default '+00:00'
+        return orjson.dumps(data, default=_drf_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
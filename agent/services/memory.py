@@ -2,7 +2,7 @@
 from typing import List, Dict, Any, Optional
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_core.memory import BaseMemory
-from django.utils import timezone
+from django.db.models import Count, Exists, Max, OuterRef, Subquery
 from ..models import Conversation, Message
 import json
 
@@ -57,8 +57,7 @@ class DjangoConversationMemory(BaseMemory):
         try:
             # Get or create conversation
             conversation, created = Conversation.objects.get_or_create(
-                session_id=self.session_id,
-                defaults={'created_at': timezone.now()}
+                session_id=self.session_id
             )
             
             # Save user input
@@ -66,8 +65,7 @@ class DjangoConversationMemory(BaseMemory):
                 Message.objects.create(
                     conversation=conversation,
                     message_type='user',
-                    content=inputs['input'],
-                    timestamp=timezone.now()
+                    content=inputs['input']
                 )
             
             # Save AI output
@@ -76,7 +74,6 @@ class DjangoConversationMemory(BaseMemory):
                     conversation=conversation,
                     message_type='assistant',
                     content=outputs['output'],
-                    timestamp=timezone.now(),
                     metadata={'agent_outputs': outputs}
                 )
             
@@ -131,22 +128,44 @@ class ConversationSearchService:
     @staticmethod
     def search_conversations(query: str = None, session_id: str = None, limit: int = 10) -> List[Conversation]:
         """Search conversations by content or session ID."""
-        conversations = Conversation.objects.all()
+        # Only the columns summaries and listings read
+        conversations = Conversation.objects.only('id', 'session_id', 'title', 'created_at', 'updated_at')
         
         if session_id:
             conversations = conversations.filter(session_id=session_id)
         
         if query:
-            # Search in message content
-            conversations = conversations.filter(
-                messages__content__icontains=query
-            ).distinct()
+            # Search in message content - a semi-join, so no row fan-out to DISTINCT away
+            conversations = conversations.filter(Exists(
+                Message.objects.filter(conversation=OuterRef('pk'), content__icontains=query)
+            ))
         
         return conversations.order_by('-updated_at')[:limit]
     
     @staticmethod
-    def get_conversation_summary(conversation: Conversation) -> Dict[str, Any]:
-        """Generate a summary of a conversation."""
+    def build_preview(content: Optional[str]) -> str:
+        """Preview text for a conversation's most recent message content."""
+        if content is None:
+            return 'No messages yet'
+        return content[:100] + "..." if len(content) > 100 else content
+
+    @staticmethod
+    def build_title(first_user_content: Optional[str]) -> str:
+        """Title text from a conversation's first user message content."""
+        if first_user_content is None:
+            return "Conversation"
+        return first_user_content[:50] + "..." if len(first_user_content) > 50 else first_user_content
+
+    @staticmethod
+    def get_conversation_summary(conversation: Conversation, messages: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Generate a summary of a conversation.
+        
+        Pass `messages` (timestamp-ordered .values() rows with message_type/content/timestamp)
+        when the caller has already loaded them, to summarize without querying again.
+        """
+        if messages is not None:
+            return ConversationSearchService._summary_from_rows(conversation, messages)
+        
         messages = conversation.messages.all().order_by('timestamp')
         
         if not messages.exists():
@@ -159,11 +178,11 @@ class ConversationSearchService:
         
         # Get first user message as title basis
         first_user_message = messages.filter(message_type='user').first()
-        title = first_user_message.content[:50] + "..." if first_user_message and len(first_user_message.content) > 50 else (first_user_message.content if first_user_message else "Conversation")
+        title = ConversationSearchService.build_title(first_user_message.content if first_user_message else None)
         
         # Get last message for preview
         last_message = messages.last()
-        preview = last_message.content[:100] + "..." if len(last_message.content) > 100 else last_message.content
+        preview = ConversationSearchService.build_preview(last_message.content if last_message else None)
         
         return {
             'title': title,
@@ -173,3 +192,61 @@ class ConversationSearchService:
             'session_id': conversation.session_id
         }
     
+    @staticmethod
+    def _summary_from_rows(conversation: Conversation, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """get_conversation_summary() over already-loaded message rows."""
+        if not rows:
+            return {
+                'title': 'Empty Conversation',
+                'message_count': 0,
+                'last_message': None,
+                'preview': 'No messages yet'
+            }
+        
+        first_user_content = next((row['content'] for row in rows if row['message_type'] == 'user'), None)
+        last_row = rows[-1]
+        
+        return {
+            'title': ConversationSearchService.build_title(first_user_content),
+            'message_count': len(rows),
+            'last_message': last_row['timestamp'],
+            'preview': ConversationSearchService.build_preview(last_row['content']),
+            'session_id': conversation.session_id
+        }
+    
+    @staticmethod
+    def bulk_summaries(conversations) -> Dict[int, Dict[str, Any]]:
+        """Summaries for many conversations in one query, keyed by conversation id."""
+        conversation_messages = Message.objects.filter(conversation=OuterRef('pk'))
+        rows = Conversation.objects.filter(
+            id__in=[conversation.id for conversation in conversations]
+        ).annotate(
+            msg_count=Count('messages'),
+            last_ts=Max('messages__timestamp'),
+            first_user_content=Subquery(
+                conversation_messages.filter(message_type='user').order_by('timestamp').values('content')[:1]
+            ),
+            last_content=Subquery(
+                conversation_messages.order_by('-timestamp').values('content')[:1]
+            ),
+        ).values('id', 'session_id', 'msg_count', 'last_ts', 'first_user_content', 'last_content')
+        
+        summaries = {}
+        for row in rows:
+            if not row['msg_count']:
+                summaries[row['id']] = {
+                    'title': 'Empty Conversation',
+                    'message_count': 0,
+                    'last_message': None,
+                    'preview': 'No messages yet'
+                }
+                continue
+            summaries[row['id']] = {
+                'title': ConversationSearchService.build_title(row['first_user_content']),
+                'message_count': row['msg_count'],
+                'last_message': row['last_ts'],
+                'preview': ConversationSearchService.build_preview(row['last_content']),
+                'session_id': row['session_id']
+            }
+        return summaries
+    
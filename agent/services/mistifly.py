@@ -1,6 +1,8 @@
 # agent/services/mistifly.py - ENHANCED CACHING VERSION WITH REVALIDATION
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -30,6 +32,7 @@ class MistiflyService:
     SESSION_TIMEOUT = 3600 * 23  # 23 hours
     SEARCH_CACHE_TIMEOUT = 60 * 30  # 30 minutes
     PRICE_CACHE_TIMEOUT = 60 * 5  # 5 minutes (prices change faster)
+    HTTP_POOL_SIZE = 16  # one keep-alive connection per concurrent gunicorn thread, with headroom
     
     MAX_FLIGHTS_RETURN = 10
 
@@ -39,6 +42,13 @@ class MistiflyService:
         
         # Use api_cache for faster responses
         self.api_cache = caches['api_cache']
+        # Keep-alive connection pool, reused across calls on this (shared) instance
+        self.session = requests.Session()
+        # Retry only failed connects - bookings are POSTs and must never be sent twice
+        self.session.mount('https://', HTTPAdapter(
+            pool_maxsize=self.HTTP_POOL_SIZE,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1)
+        ))
 
     # ================================================================
     # AUTHENTICATION (ASR Hub - Bearer Token) - CACHED
@@ -53,7 +63,7 @@ class MistiflyService:
         }
         try:
             logger.info("[Mistifly] Creating new session...")
-            response = requests.post(url, json=payload, timeout=30)
+            response = self.session.post(url, json=payload, timeout=30)
             try:
                 data = response.json()
             except ValueError:
@@ -96,7 +106,7 @@ class MistiflyService:
         }
 
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=45)
+            response = self.session.post(url, json=payload, headers=headers, timeout=45)
             
             logger.debug(f"[Mistifly] Response status: {response.status_code}")
             logger.debug(f"[Mistifly] Response headers: {dict(response.headers)}")
@@ -107,7 +117,7 @@ class MistiflyService:
                 cache.delete(self.SESSION_CACHE_KEY)
                 token = self._create_session()
                 headers["Authorization"] = f"Bearer {token}"
-                response = requests.post(url, json=payload, headers=headers, timeout=45)
+                response = self.session.post(url, json=payload, headers=headers, timeout=45)
             
             try:
                 data = response.json()
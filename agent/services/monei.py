@@ -4,6 +4,8 @@ import os
 import hmac
 import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import time
 from typing import Dict, Optional, Tuple
@@ -29,6 +31,7 @@ class MoneiService:
     """
     
     BASE_URL = "https://api.monei.cc/v1"
+    HTTP_POOL_SIZE = 16  # one keep-alive connection per concurrent gunicorn thread, with headroom
     
     # Status mapping based on MONEI docs
     STATUS_MAP = {
@@ -55,12 +58,31 @@ class MoneiService:
         if not self.api_key:
             raise ValueError("Missing MONEI_API_KEY environment variable")
 
+        # Keyed HMAC state, copied per webhook so the key setup isn't redone each time
+        self._hmac_template = (
+            hmac.new(self.webhook_secret.encode('utf-8'), digestmod=hashlib.sha256)
+            if self.webhook_secret else None
+        )
+
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
             "User-Agent": "MoneiPythonCustom/1.0"
         }
 
+        # Keep-alive connection pool, reused across calls on the shared instance
+        self.session = requests.Session()
+        # Payment POSTs carry an Idempotency-Key, so gateway errors are safe to retry too
+        self.session.mount('https://', HTTPAdapter(
+            pool_maxsize=self.HTTP_POOL_SIZE,
+            max_retries=Retry(
+                total=3, connect=2, read=0, status=2, backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({'GET', 'POST'}),
+                raise_on_status=False,
+            )
+        ))
+
     # ================================================================
     # PAYMENT CREATION
     # ================================================================
@@ -111,7 +133,7 @@ class MoneiService:
             
             logger.info(f"[Monei] Creating payment for Order {booking_id}: {currency} {amount}")
             
-            response = requests.post(url, json=payload, headers=req_headers, timeout=30)
+            response = self.session.post(url, json=payload, headers=req_headers, timeout=30)
             data = response.json()
 
             if not response.ok:
@@ -136,7 +158,7 @@ class MoneiService:
         Verifies the MONEI-Signature header.
         Header format: t=1600000000,v1=abcdef123456...
         """
-        if not self.webhook_secret:
+        if self._hmac_template is None:
             logger.error("MONEI_WEBHOOK_SECRET is not set")
             return False
 
@@ -158,18 +180,14 @@ class MoneiService:
                 logger.warning("[Monei] Webhook timestamp too old (replay attack?)")
                 return False
 
-            # 3. Construct Signed Payload: timestamp + "." + raw_body
+            # 3. Calculate Expected HMAC over timestamp + "." + raw_body
             # Note: raw_body must be the exact bytes received, not parsed JSON
-            signed_payload = f"{timestamp}.".encode('utf-8') + raw_body
-            
-            # 4. Calculate Expected HMAC
-            expected_signature = hmac.new(
-                self.webhook_secret.encode('utf-8'),
-                signed_payload,
-                hashlib.sha256
-            ).hexdigest()
-
-            # 5. Secure Compare
+            mac = self._hmac_template.copy()
+            mac.update(f"{timestamp}.".encode('utf-8'))
+            mac.update(raw_body)
+            expected_signature = mac.hexdigest()
+
+            # 4. Secure Compare
             return hmac.compare_digest(expected_signature, received_signature)
 
         except Exception as e:
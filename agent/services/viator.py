@@ -1,31 +1,37 @@
 # agent/services/viator.py - ENHANCED CACHING VERSION
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 from typing import List, Dict, Optional
 from functools import wraps
-import json
-from django.core.cache import cache, caches
-import hashlib
-from django.conf import settings
+import orjson
+from django.core.cache import caches
 import logging
 
-load_dotenv()
 logger = logging.getLogger(__name__)
 
 
 class ViatorAPIError(Exception):
     """Custom exception for Viator API errors."""
-    def __init__(self, status_code: int, message: str):
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
         self.status_code = status_code
         self.message = message
+        self.retry_after = retry_after
         super().__init__(f"Viator API error {status_code}: {message}")
 
 
-def retry_on_rate_limit(max_retries=3, backoff_factor=2):
-    """Retry decorator for handling 429 rate limits."""
+def retry_on_rate_limit(max_retries=2, backoff_factor=2, max_wait=10):
+    """
+    Retry decorator for handling 429 rate limits (honors Retry-After when sent).
+
+    A Retry-After longer than max_wait is re-raised instead of slept on, so a
+    request thread is never parked for the whole rate-limit window.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -33,8 +39,9 @@ def retry_on_rate_limit(max_retries=3, backoff_factor=2):
                 try:
                     return func(*args, **kwargs)
                 except ViatorAPIError as e:
-                    if e.status_code == 429 and attempt < max_retries - 1:
-                        wait_time = backoff_factor ** attempt
+                    if (e.status_code == 429 and attempt < max_retries - 1
+                            and (e.retry_after is None or e.retry_after <= max_wait)):
+                        wait_time = e.retry_after if e.retry_after is not None else backoff_factor ** attempt
                         logger.warning(f"[Viator] Rate limit hit, retrying in {wait_time}s...")
                         time.sleep(wait_time)
                     else:
@@ -44,48 +51,199 @@ def retry_on_rate_limit(max_retries=3, backoff_factor=2):
     return decorator
 
 
+class LocalTTLCache:
+    """Small thread-safe LRU with per-entry expiry, used as an in-process L1 in front of Redis."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class _Flight:
+    """One in-progress fetch that concurrent callers for the same key wait on."""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BackpressureController:
+    """
+    AIMD concurrency limiter for outbound Viator calls.
+
+    The limit halves on every 429/5xx/timeout and grows by one slot each time a
+    full latency window averages below the target.
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 32,
+                 target_latency: float = 2.0, window: int = 16,
+                 alpha: int = 1, beta: float = 0.5):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.alpha = alpha
+        self.beta = beta
+        self._in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._in_flight >= self.limit:
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, overloaded: bool) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            if overloaded:
+                self.limit = max(self.minimum, int(self.limit * self.beta))
+                self._latencies.clear()
+                logger.warning(f"[Viator] Backpressure: concurrency limit reduced to {self.limit}")
+            else:
+                self._latencies.append(latency)
+                if (len(self._latencies) == self._latencies.maxlen
+                        and sum(self._latencies) / len(self._latencies) < self.target_latency
+                        and self.limit < self.maximum):
+                    self.limit = min(self.maximum, self.limit + self.alpha)
+                    self._latencies.clear()
+            self._cond.notify_all()
+
+
 class ViatorService:
-    BASE_URL = os.getenv("VIATOR_BASE_URL", "https://api.viator.com/partner")
-    AFFILIATE_ID = os.getenv("VIATOR_AFFILIATE_ID", "")
+    # Filled from the environment by _load_env() on first instantiation
+    BASE_URL = "https://api.viator.com/partner"
+    AFFILIATE_ID = ""
     HEADERS = {
-        "exp-api-key": os.getenv("VIATOR_API_KEY"),
+        "exp-api-key": None,
         "Accept": "application/json;version=2.0",
         "Content-Type": "application/json",
         "Accept-Language": "en-US"
     }
+    _env_loaded = False
     
     # Cache configuration
     CACHE_TTL_SEARCH = 60 * 60      # 60 minutes — tours change very slowly
+    CACHE_TTL_SEARCH_EMPTY = 60 * 5  # 5 minutes — a cached [] is served until it expires, so keep it short
+    CACHE_TTL_DEST_MISSING = 60 * 60  # 60 minutes for unknown destination names
     CACHE_TTL_DESTINATIONS = 60 * 60 * 24  # 24 hours
     CACHE_TTL_PRODUCT_DETAILS = 60 * 30  # 30 minutes
     CACHE_TTL_AVAILABILITY = 60 * 10  # 10 minutes (availability changes faster)
+    L1_CACHE_SIZE = 1024
+    L1_CACHE_TTL = 60 * 10  # in-process copies live at most 10 minutes
+    HTTP_POOL_SIZE = 32  # one pool shared by every gunicorn thread
+
+    # Proactive rate limiting (shared by every instance in the process)
+    RATE_LIMIT_THRESHOLD = 2  # start waiting when this few requests remain in the window
+    RATE_LIMIT_MAX_WAIT = 10  # never block a caller longer than this (seconds)
+    _rl_state = {"remaining": None, "reset_at": 0.0}
+    _rl_lock = threading.Lock()
+
+    # Adaptive concurrency limit around the HTTP call (shared by every instance)
+    _backpressure = BackpressureController()
+
+    # Process-local L1 in front of api_cache; holds orjson bytes so callers never share objects
+    _l1 = LocalTTLCache(maxsize=L1_CACHE_SIZE, ttl=L1_CACHE_TTL)
+
+    # Single-flight: concurrent cache misses for the same key share one API call
+    _inflight: Dict[str, _Flight] = {}
+    _inflight_lock = threading.Lock()
+
+    @classmethod
+    def _load_env(cls):
+        """Read .env and Viator settings once per process (keeps module import cheap)."""
+        if cls._env_loaded:
+            return
+        from dotenv import load_dotenv
+        load_dotenv()
+        ViatorService.BASE_URL = os.getenv("VIATOR_BASE_URL", ViatorService.BASE_URL)
+        ViatorService.AFFILIATE_ID = os.getenv("VIATOR_AFFILIATE_ID", "")
+        ViatorService.HEADERS = {**ViatorService.HEADERS, "exp-api-key": os.getenv("VIATOR_API_KEY")}
+        ViatorService._env_loaded = True
 
     def __init__(self):
+        self._load_env()
         if not self.HEADERS["exp-api-key"]:
             raise ValueError("Missing VIATOR_API_KEY in environment variables. Please set VIATOR_API_KEY in your .env file.")
         
         self.destinations_cache = None
         # Use api_cache for faster responses
         self.api_cache = caches['api_cache']
+        # Keep-alive connection pool, reused across calls on this (shared) instance
+        self.session = requests.Session()
+        # Retry only failed connects - the request never reached Viator, so it's always safe
+        self.session.mount('https://', HTTPAdapter(
+            pool_maxsize=self.HTTP_POOL_SIZE,
+            max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.1)
+        ))
+        # Constant affiliate query string, appended to every product URL
+        self._aff_suffix = f"pid={self.AFFILIATE_ID}&mcid=42383" if self.AFFILIATE_ID else ""
 
     # ================================================================
     # API REQUEST WRAPPER
     # ================================================================
-    @retry_on_rate_limit()
+    @retry_on_rate_limit(max_wait=RATE_LIMIT_MAX_WAIT)
     def _make_request(self, method: str, endpoint: str,
                       params: Dict = None, json: Dict = None) -> Optional[Dict]:
         """Make a Viator API request with error handling and retries."""
+        self._wait_if_throttled()
         url = f"{self.BASE_URL.rstrip('/')}/{endpoint.lstrip('/')}"
         try:
             logger.debug(f"[Viator] {method} {endpoint}")
-            response = requests.request(
-                method, url,
-                headers=self.HEADERS,
-                params=params,
-                json=json,
-                timeout=30
-            )
+            self._backpressure.acquire()
+            started = time.monotonic()
+            overloaded = True
+            try:
+                response = self.session.request(
+                    method, url,
+                    headers=self.HEADERS,
+                    params=params,
+                    json=json,
+                    timeout=30
+                )
+                overloaded = response.status_code == 429 or response.status_code >= 500
+            finally:
+                self._backpressure.release(time.monotonic() - started, overloaded)
+            self._record_rate_limit(response)
             
+            if response.status_code == 429:
+                retry_after = self._parse_seconds(response.headers.get("Retry-After"))
+                logger.warning(f"[Viator] Rate limited (Retry-After: {retry_after})")
+                raise ViatorAPIError(429, response.text, retry_after=retry_after)
+
             if not response.ok:
                 logger.error(f"[Viator] API error {response.status_code}: {response.text[:200]}")
                 raise ViatorAPIError(response.status_code, response.text)
@@ -103,6 +261,120 @@ class ViatorService:
             logger.error(f"[Viator] Request failed: {message[:200]}")
             raise ViatorAPIError(status_code, message)
 
+    @classmethod
+    def _single_flight(cls, key: str, fetch):
+        """Run fetch() once per key; concurrent callers wait for and share its result."""
+        with cls._inflight_lock:
+            flight = cls._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = cls._inflight[key] = _Flight()
+
+        if not leader:
+            logger.debug(f"[Viator] Waiting on in-flight request for {key}")
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with cls._inflight_lock:
+                cls._inflight.pop(key, None)
+            flight.event.set()
+
+    # ================================================================
+    # CACHE SERIALIZATION - orjson bytes instead of pickled dicts
+    # ================================================================
+    def _cache_get(self, key: str):
+        """Read from the process-local L1, falling back to api_cache (None on miss)."""
+        value = self._l1.get(key)
+        if value is not None:
+            return value
+        value = self.api_cache.get(key)
+        if value is not None:
+            # Refill L1 for no longer than the entry has left in Redis (e.g. 5 min for empty searches)
+            remaining = self.api_cache.ttl(key)
+            if remaining != 0:
+                self._l1.set(key, value, remaining)
+        return value
+
+    def _cache_set(self, key: str, value, ttl: int) -> None:
+        """Write to api_cache and the process-local L1."""
+        self.api_cache.set(key, value, timeout=ttl)
+        self._l1.set(key, value, ttl)
+
+    def _cache_get_json(self, key: str):
+        """Read an orjson-encoded blob from the cache (None on miss)."""
+        raw = self._cache_get(key)
+        if raw is None:
+            return None
+        # Entries written before the switch are still plain pickled objects
+        return orjson.loads(raw) if isinstance(raw, (bytes, str)) else raw
+
+    def _cache_set_json(self, key: str, obj, ttl: int) -> None:
+        """Store obj as orjson bytes."""
+        self._cache_set(key, orjson.dumps(obj), ttl)
+
+    # ================================================================
+    # RATE LIMITING - PROACTIVE (header-driven)
+    # ================================================================
+    @staticmethod
+    def _parse_seconds(value: Optional[str]) -> Optional[float]:
+        """Parse a numeric header value, returning None when absent or malformed."""
+        try:
+            return max(float(value), 0.0) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    @classmethod
+    def _record_rate_limit(cls, response) -> None:
+        """Store the rate-limit window advertised by Viator on every response."""
+        headers = response.headers
+        remaining = headers.get("X-RateLimit-Remaining", headers.get("RateLimit-Remaining"))
+        if remaining is None:
+            return
+        try:
+            remaining = int(remaining)
+        except ValueError:
+            return
+
+        reset = cls._parse_seconds(headers.get("X-RateLimit-Reset", headers.get("RateLimit-Reset")))
+        now = time.time()
+        if reset is None:
+            reset_at = now + 1
+        elif reset > 10 ** 9:
+            reset_at = reset  # absolute epoch timestamp
+        else:
+            reset_at = now + reset  # seconds until the window resets
+
+        with cls._rl_lock:
+            cls._rl_state["remaining"] = remaining
+            cls._rl_state["reset_at"] = reset_at
+
+    @classmethod
+    def _wait_if_throttled(cls) -> None:
+        """Sleep until the window resets if we are about to exhaust the quota."""
+        with cls._rl_lock:
+            remaining = cls._rl_state["remaining"]
+            reset_at = cls._rl_state["reset_at"]
+            if remaining is None or remaining > cls.RATE_LIMIT_THRESHOLD:
+                if remaining is not None:
+                    cls._rl_state["remaining"] = remaining - 1
+                return
+
+        wait_time = min(reset_at - time.time(), cls.RATE_LIMIT_MAX_WAIT)
+        if wait_time > 0:
+            logger.warning(f"[Viator] {remaining} requests left in window, waiting {wait_time:.1f}s")
+            time.sleep(wait_time)
+        with cls._rl_lock:
+            cls._rl_state["remaining"] = None
+
     # ================================================================
     # DESTINATIONS - CACHED
     # ================================================================
@@ -115,7 +387,7 @@ class ViatorService:
 
         # Check Redis cache
         cache_key = "viator:destinations"
-        cached = self.api_cache.get(cache_key)
+        cached = self._cache_get_json(cache_key)
         if cached is not None:
             logger.info("[Cache HIT] Viator destinations")
             self.destinations_cache = cached
@@ -139,8 +411,15 @@ class ViatorService:
         else:
             raise ViatorAPIError(500, "Unexpected destination response type.")
 
+        # Only name + ID are used for resolution; drop the rest before it is cached
+        destinations = [
+            {"name": d.get("name", ""), "destinationId": d["destinationId"]}
+            for d in destinations if d.get("destinationId") is not None
+        ]
+        del response
+
         # Cache for 24 hours
-        self.api_cache.set(cache_key, destinations, timeout=self.CACHE_TTL_DESTINATIONS)
+        self._cache_set_json(cache_key, destinations, self.CACHE_TTL_DESTINATIONS)
         self.destinations_cache = destinations
         logger.info(f"[Viator] Cached {len(destinations)} destinations for 24h")
         return destinations
@@ -148,13 +427,20 @@ class ViatorService:
     def resolve_destination(self, name: str) -> str:
         """Resolve destination name to its Viator ID - uses cached destinations."""
         # Build cache key for resolved destination
-        cache_key = f"viator:dest_id:{name.lower().strip()}"
+        name_key = name.lower().strip()
+        cache_key = f"viator:dest_id:{name_key}"
+        missing_key = f"viator:dest_id:missing:{name_key}"
         
         # Check if we've already resolved this destination
-        cached_id = self.api_cache.get(cache_key)
+        cached_id = self._cache_get(cache_key)
         if cached_id:
             logger.debug(f"[Cache HIT] Destination ID for '{name}': {cached_id}")
             return cached_id
+
+        # Check if we've already failed to resolve it
+        if self._cache_get(missing_key):
+            logger.debug(f"[Cache HIT] Destination '{name}' known to be missing")
+            raise ViatorAPIError(404, f"Destination '{name}' not found in Viator database.")
         
         # Resolve from destinations list (which is cached)
         destinations = self.get_destinations()
@@ -168,12 +454,13 @@ class ViatorService:
             match = next((d for d in destinations if name_lower in d.get("name", "").lower()), None)
 
         if not match:
+            self._cache_set(missing_key, True, self.CACHE_TTL_DEST_MISSING)
             raise ViatorAPIError(404, f"Destination '{name}' not found in Viator database.")
         
         dest_id = int(match.get("destinationId"))
         
         # Cache the resolved ID for 24 hours
-        self.api_cache.set(cache_key, dest_id, timeout=self.CACHE_TTL_DESTINATIONS)
+        self._cache_set(cache_key, dest_id, self.CACHE_TTL_DESTINATIONS)
         logger.info(f"[Viator] Resolved '{name}' -> ID {dest_id}")
         return dest_id
 
@@ -183,7 +470,6 @@ class ViatorService:
     def search_tours(self, query: Optional[str], destination: str,
                      start_date: Optional[str] = None, page_size: int = 5) -> List[Dict]:
         """Search for tours — fully cached by destination + date range + page_size."""
-        
         # Normalize inputs
         destination_norm = destination.strip().title()
         page_size = min(page_size, 20)  # safety limit
@@ -206,35 +492,50 @@ class ViatorService:
         dest_id = self.resolve_destination(destination_norm)
 
         # BUILD CACHE KEY
-        cache_parts = f"{destination_norm}|{start_date}|{end_date}|{page_size}"
-        cache_key = f"viator:tours:{hashlib.md5(cache_parts.encode()).hexdigest()}"
+        cache_key = f"viator:tours:{destination_norm}:{start_date}:{end_date}:{page_size}"
 
         # TRY CACHE FIRST
-        cached = self.api_cache.get(cache_key)
+        cached = self._cache_get_json(cache_key)
         if cached is not None:
             logger.info(f"[Cache HIT] Viator tours in {destination_norm}")
             return cached
 
         logger.info(f"[Cache MISS] Calling Viator API for tours in {destination_norm}")
+        return self._single_flight(
+            cache_key,
+            lambda: self._fetch_tours(cache_key, dest_id, destination_norm, start_date, end_date, page_size)
+        )
+
+    # Constant parts of the products/search body; only the filtering dates/destination and page size vary
+    _SEARCH_PAYLOAD_TEMPLATE = {
+        "filtering": {
+            "highestPrice": 10000,
+            "durationInMinutes": {"from": 0, "to": 1000},
+            "rating": {"from": 0, "to": 5}
+        },
+        "productSorting": {
+            "sort": "PRICE",
+            "order": "ASCENDING"
+        },
+        "currency": "USD"
+    }
 
-        # API payload
+    def _fetch_tours(self, cache_key: str, dest_id: int, destination_norm: str,
+                     start_date: str, end_date: str, page_size: int) -> List[Dict]:
+        """Call products/search and cache the formatted result."""
+        # API payload (shares the template's constant sub-dicts)
+        template = self._SEARCH_PAYLOAD_TEMPLATE
         payload = {
+            **template,
             "filtering": {
+                **template["filtering"],
                 "destination": str(dest_id),
                 "startDate": start_date,
-                "endDate": end_date,
-                "highestPrice": 10000,
-                "durationInMinutes": {"from": 0, "to": 1000},
-                "rating": {"from": 0, "to": 5}
-            },
-            "productSorting": {
-                "sort": "PRICE", 
-                "order": "ASCENDING"
+                "endDate": end_date
             },
             "searchTypes": [
                 {"searchType": "PRODUCTS", "pagination": {"start": 1, "count": page_size}}
-            ],
-            "currency": "USD"
+            ]
         }
 
         data = self._make_request("POST", "products/search", json=payload)
@@ -249,15 +550,15 @@ class ViatorService:
             tours_data = data["products"]
         else:
             result = []
-            # Cache empty result for shorter time
-            self.api_cache.set(cache_key, result, timeout=60 * 5)
+            # Cache empty result for shorter time — reads serve it as-is until it expires
+            self._cache_set_json(cache_key, result, self.CACHE_TTL_SEARCH_EMPTY)
             logger.info(f"[Viator] No tours found for {destination_norm}")
             return result
 
         result = self._format_tours(tours_data)
 
         # CACHE FOR 60 MINUTES
-        self.api_cache.set(cache_key, result, timeout=self.CACHE_TTL_SEARCH)
+        self._cache_set_json(cache_key, result, self.CACHE_TTL_SEARCH)
         logger.info(f"[Viator] Found {len(result)} tours, cached for {self.CACHE_TTL_SEARCH}s")
         return result
 
@@ -269,13 +570,16 @@ class ViatorService:
         cache_key = f"viator:product:{product_code}"
         
         # Try cache first
-        cached = self.api_cache.get(cache_key)
+        cached = self._cache_get_json(cache_key)
         if cached:
             logger.info(f"[Cache HIT] Product details for {product_code}")
             return cached
         
         logger.info(f"[Cache MISS] Fetching product {product_code}")
-        
+        return self._single_flight(cache_key, lambda: self._fetch_product_details(cache_key, product_code))
+
+    def _fetch_product_details(self, cache_key: str, product_code: str) -> Dict:
+        """Call products/{code} and cache the formatted result."""
         data = self._make_request("GET", f"products/{product_code}")
         product = data.get("data", data)
         
@@ -296,7 +600,7 @@ class ViatorService:
         }
         
         # Cache for 30 minutes
-        self.api_cache.set(cache_key, formatted, timeout=self.CACHE_TTL_PRODUCT_DETAILS)
+        self._cache_set_json(cache_key, formatted, self.CACHE_TTL_PRODUCT_DETAILS)
         logger.info(f"[Viator] Product {product_code} cached")
         return formatted
 
@@ -308,13 +612,16 @@ class ViatorService:
         cache_key = f"viator:avail:{product_code}"
         
         # Try cache first
-        cached = self.api_cache.get(cache_key)
+        cached = self._cache_get_json(cache_key)
         if cached:
             logger.info(f"[Cache HIT] Availability for {product_code}")
             return cached
         
         logger.info(f"[Cache MISS] Checking availability for {product_code}")
-        
+        return self._single_flight(cache_key, lambda: self._fetch_availability(cache_key, product_code))
+
+    def _fetch_availability(self, cache_key: str, product_code: str) -> Dict:
+        """Call availability/schedules/{code} and cache the result."""
         data = self._make_request("GET", f"availability/schedules/{product_code}")
         if not data or "schedules" not in data:
             raise ViatorAPIError(404, f"No availability found for product {product_code}.")
@@ -322,7 +629,7 @@ class ViatorService:
         result = {"product_code": product_code, "schedules": data["schedules"][:10]}
         
         # Cache for 10 minutes (availability changes more frequently)
-        self.api_cache.set(cache_key, result, timeout=self.CACHE_TTL_AVAILABILITY)
+        self._cache_set_json(cache_key, result, self.CACHE_TTL_AVAILABILITY)
         logger.info(f"[Viator] Availability for {product_code} cached")
         return result
 
@@ -332,32 +639,39 @@ class ViatorService:
     def _format_tours(self, tours: List[Dict]) -> List[Dict]:
         """Format raw tour data into standardized output."""
         formatted = []
+        append = formatted.append
+        add_tracking = self._add_affiliate_tracking
         for item in tours:
-            images = item.get("images", [])
+            get = item.get
+            images = get("images")
             thumbnail = images[0].get("url", "") if images else ""
-            
+            summary = (get("pricing") or {}).get("summary") or {}
+            reviews = get("reviews") or {}
+            duration = get("duration") or {}
+            code = get("productCode", "")
+
             # Get or create URL
-            web_url = item.get("webUrl", "")
-            if not web_url and item.get("productCode"):
-                web_url = f"https://www.viator.com/tours/d{item['productCode']}"
-            
-            formatted.append({
-                "code": item.get("productCode", ""),
-                "title": item.get("title", "Untitled"),
-                "price": float(item.get("pricing", {}).get("summary", {}).get("fromPrice", 0)),
-                "rating": float(item.get("reviews", {}).get("combinedAverageRating", 0)),
-                "reviewCount": item.get("reviews", {}).get("totalReviews", 0),
-                "duration": item.get("duration", {}).get("durationText", "N/A"),
+            web_url = get("webUrl", "")
+            if not web_url and code:
+                web_url = f"https://www.viator.com/tours/d{code}"
+
+            append({
+                "code": code,
+                "title": get("title", "Untitled"),
+                "price": float(summary.get("fromPrice", 0)),
+                "rating": float(reviews.get("combinedAverageRating", 0)),
+                "reviewCount": reviews.get("totalReviews", 0),
+                "duration": duration.get("durationText", "N/A"),
                 "thumbnail": thumbnail,
-                "url": self._add_affiliate_tracking(web_url)
+                "url": add_tracking(web_url)
             })
         return formatted
 
     def _add_affiliate_tracking(self, url: str) -> str:
         """Add affiliate tracking parameters to Viator product URLs."""
-        if not url or not self.AFFILIATE_ID:
+        if not url or not self._aff_suffix:
             return url
-        return f"{url}{'&' if '?' in url else '?'}pid={self.AFFILIATE_ID}&mcid=42383"
+        return url + ("&" if "?" in url else "?") + self._aff_suffix
 
     # ================================================================
     # CACHE MANAGEMENT
@@ -374,11 +688,15 @@ class ViatorService:
             ]
             for key in keys_to_clear:
                 api_cache.delete(key)
+                cls._l1.delete(key)
                 logger.info(f"[Viator] Cleared cache for {key}")
         
         elif destination:
-            # Would need Redis SCAN for pattern matching
-            logger.warning(f"[Viator] Destination-specific cache clear requires Redis SCAN")
+            # Tour keys are plain "viator:tours:<Destination>:..." strings, so SCAN can match them
+            pattern = f"viator:tours:{destination.strip().title()}:*"
+            deleted = api_cache.delete_pattern(pattern)
+            cls._l1.clear()  # other processes keep their copies until L1_CACHE_TTL
+            logger.info(f"[Viator] Cleared {deleted} tour searches for {destination}")
         
         else:
             logger.warning("[Viator] Full cache clear not recommended")
@@ -391,9 +709,13 @@ class ViatorService:
             'cache_backend': 'redis',
             'cache_alias': 'api_cache',
             'ttl_search': cls.CACHE_TTL_SEARCH,
+            'ttl_search_empty': cls.CACHE_TTL_SEARCH_EMPTY,
+            'ttl_dest_missing': cls.CACHE_TTL_DEST_MISSING,
             'ttl_destinations': cls.CACHE_TTL_DESTINATIONS,
             'ttl_product_details': cls.CACHE_TTL_PRODUCT_DETAILS,
             'ttl_availability': cls.CACHE_TTL_AVAILABILITY,
+            'l1_size': cls.L1_CACHE_SIZE,
+            'l1_ttl': cls.L1_CACHE_TTL,
         }
 
 
@@ -0,0 +1,43 @@
+# agent/tasks.py
+"""
+Background tasks (Celery) - work that must not hold up a request/webhook response
+"""
+
+import logging
+
+from celery import shared_task
+
+from agent.handlers import get_handlers
+from agent.models import FlightBooking
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3)
+def issue_ticket_task(self, booking_id: str):
+    """Issue the Mistifly ticket for a paid booking, retrying with backoff"""
+    booking = FlightBooking.objects.get(booking_id=booking_id)
+    if booking.ticket_status == 'ISSUED':
+        return
+
+    try:
+        logger.info("[Ticketing] Issuing ticket for order %s", booking.mistifly_order_id)
+        ticket_result = get_handlers().mistifly.issue_ticket(booking.mistifly_order_id)
+    except Exception as e:
+        if self.request.retries < self.max_retries:
+            logger.warning("[Ticketing] Attempt %d failed for booking %s: %s", self.request.retries + 1, booking_id, e)
+            raise self.retry(exc=e, countdown=60 * 2 ** self.request.retries)
+        # Out of retries - the user has paid, so flag it for manual ticketing
+        logger.error("[Ticketing] Failed for booking %s: %s", booking_id, e)
+        booking.ticket_status = 'FAILED'
+        booking.notes = f"PAID BUT TICKET FAILED: {str(e)}"
+        booking.save(update_fields=['ticket_status', 'notes', 'updated_at'])
+        return
+
+    extra_fields = []
+    if ticket_result.get('airline_pnr'):
+        booking.airline_pnr = ticket_result['airline_pnr']
+        extra_fields.append('airline_pnr')
+    booking.mark_as_ticketed(ticket_result.get('ticket_numbers', []), extra_fields=extra_fields)
+
+    logger.info("[Ticketing] Ticket issued: %s", ticket_result.get('ticket_numbers'))
@@ -1,3 +1,275 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import orjson
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from agent.models import FlightBooking, Payment, WebhookLog
+from agent.tasks import issue_ticket_task
+from agent.utils.classifier import QueryClassifier
+from agent.views import ChatView, MoneiWebhookView
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+FLIGHT_QUERY = "flight from lagos to london on 5 may"
+
+
+def make_booking(**fields):
+    defaults = {
+        'session_id': 'test-session',
+        'mistifly_order_id': 'MF-ORDER-1',
+        'origin': 'LOS',
+        'destination': 'LHR',
+        'departure_date': date.today() + timedelta(days=30),
+        'total_amount': '450.00',
+        'contact_email': 'traveller@example.com',
+        'contact_phone': '+2348000000000',
+    }
+    defaults.update(fields)
+    return FlightBooking.objects.create(**defaults)
+
+
+class QueryClassifierFlightTests(SimpleTestCase):
+    """Flight parameter extraction - which queries skip the agent"""
+
+    def assertRoute(self, query, origin, destination):
+        result = QueryClassifier.classify(query)
+        self.assertEqual(result['type'], 'flight')
+        self.assertFalse(result['use_agent'])
+        self.assertEqual(result['params']['origin'], origin)
+        self.assertEqual(result['params']['destination'], destination)
+
+    def assertRouteUnresolved(self, query):
+        result = QueryClassifier.classify(query)
+        self.assertTrue(result['use_agent'])
+        self.assertIsNone(result['params'].get('origin'))
+
+    def test_city_names(self):
+        self.assertRoute(FLIGHT_QUERY, 'LOS', 'LHR')
+
+    def test_multi_word_city_names(self):
+        self.assertRoute("flight from abu dhabi to new york on 5 may", 'AUH', 'JFK')
+
+    def test_city_name_wins_over_code_prefix(self):
+        # "los angeles" is a city, not the LOS code followed by a stray word
+        self.assertRoute("fly los angeles to abu dhabi on 5 may", 'LAX', 'AUH')
+        self.assertRoute("flight from port harcourt to los angeles on 5 may", 'PHC', 'LAX')
+
+    def test_uppercase_codes(self):
+        self.assertRoute("flight LOS to DXB on 5 may", 'LOS', 'DXB')
+
+    def test_code_after_from(self):
+        self.assertRoute("flight from abv to dubai on 5 may", 'ABV', 'DXB')
+
+    def test_known_lowercase_codes(self):
+        self.assertRoute("flight los to dxb on 5 may", 'LOS', 'DXB')
+
+    def test_pronoun_is_not_an_airport(self):
+        self.assertRouteUnresolved("flight for him to rome on 5 may")
+
+    def test_short_word_is_not_an_airport(self):
+        self.assertRouteUnresolved("ticket for mum to dubai on 5 may")
+
+    def test_unknown_lowercase_code(self):
+        self.assertRouteUnresolved("fly xyz to rome on 5 may")
+
+
+    def test_cabin_class(self):
+        result = QueryClassifier.classify("business class flight from lagos to london on 5 may")
+        self.assertEqual(result['params']['cabin_class'], 'BUSINESS')
+
+    def test_cabin_class_priority(self):
+        # business > first > premium, wherever each appears in the query
+        result = QueryClassifier.classify("premium economy or business from lagos to london on 5 may")
+        self.assertEqual(result['params']['cabin_class'], 'BUSINESS')
+        result = QueryClassifier.classify("premium or first class flight from lagos to london on 5 may")
+        self.assertEqual(result['params']['cabin_class'], 'FIRST')
+
+class FlightBookingStateTests(TestCase):
+    """Booking state changes write only the columns they own"""
+
+    def setUp(self):
+        self.booking = make_booking()
+        # Changed by another process after this instance was loaded
+        FlightBooking.objects.filter(pk=self.booking.pk).update(notes='set elsewhere')
+
+    def test_mark_as_paid_leaves_other_columns_alone(self):
+        self.booking.mark_as_paid('txn_1', 'card')
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, 'PAID')
+        self.assertEqual(self.booking.transaction_id, 'txn_1')
+        self.assertEqual(self.booking.payment_method, 'card')
+        self.assertEqual(self.booking.notes, 'set elsewhere')
+
+    def test_mark_as_ticketed_leaves_other_columns_alone(self):
+        self.booking.mark_as_ticketed(['0831234567890'])
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.ticket_status, 'ISSUED')
+        self.assertEqual(self.booking.ticket_numbers, ['0831234567890'])
+        self.assertEqual(self.booking.notes, 'set elsewhere')
+
+    def test_extra_fields_are_written_in_the_same_update(self):
+        self.booking.ticket_status = 'ISSUING'
+        with self.assertNumQueries(1):
+            self.booking.mark_as_paid('txn_1', 'card', extra_fields=['ticket_status'])
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, 'PAID')
+        self.assertEqual(self.booking.ticket_status, 'ISSUING')
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ChatResponseCacheTests(SimpleTestCase):
+    """View-level caching of chat replies"""
+
+    def setUp(self):
+        cache.clear()
+        for name, value in (('_get_conversation_id', 1), ('_save_turn', None)):
+            patcher = mock.patch.object(ChatView, name, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def chat(self, text, session_id):
+        return self.client.post(
+            reverse('chat'), {'input': text, 'session_id': session_id},
+            content_type='application/json'
+        ).json()
+
+    def test_direct_handler_error_is_shared_across_sessions(self):
+        error = {'success': False, 'error': 'Flight service down'}
+        with mock.patch.object(ChatView, '_handle_with_direct_handler', return_value=error) as handler:
+            self.chat(FLIGHT_QUERY, 'session-a')
+            reply = self.chat(FLIGHT_QUERY, 'session-b')
+
+        handler.assert_called_once()
+        self.assertTrue(reply['cached'])
+        self.assertEqual(reply['session_id'], 'session-b')
+
+    def test_agent_error_is_not_shared_across_sessions(self):
+        replies = [
+            {'success': False, 'error': 'Agent failed'},
+            {'success': True, 'type': 'conversational', 'message': 'Booked'},
+        ]
+        with mock.patch.object(ChatView, '_handle_with_agent', side_effect=replies) as handler:
+            self.chat('book it', 'session-a')
+            reply = self.chat('book it', 'session-b')
+
+        self.assertEqual(handler.call_count, 2)
+        self.assertTrue(reply['success'])
+        self.assertFalse(reply['cached'])
+
+
+    def test_rephrased_search_is_served_from_one_cache_read(self):
+        result = {'success': True, 'type': 'flight_search', 'flights': []}
+        with mock.patch.object(ChatView, '_handle_with_direct_handler', return_value=result) as handler:
+            self.chat(FLIGHT_QUERY, 'session-a')
+            with mock.patch('agent.views.cache', wraps=cache) as spy:
+                reply = self.chat("flights from lagos to london on 5 may", 'session-a')
+
+        handler.assert_called_once()
+        self.assertTrue(reply['cached'])
+        # Error, exact and intent keys are fetched together
+        spy.get_many.assert_called_once()
+        spy.get.assert_not_called()
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MoneiWebhookIdempotencyTests(TestCase):
+    """Replayed and retried MONEI deliveries"""
+
+    def setUp(self):
+        self.booking = make_booking()
+        monei = mock.Mock()
+        monei.verify_webhook_signature.return_value = True
+        patcher = mock.patch('agent.views.get_monei_service', return_value=monei)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post_event(self, event_type='payment.succeeded', event_id='evt_1'):
+        body = orjson.dumps({
+            'id': event_id,
+            'type': event_type,
+            'data': {'id': 'pay_1', 'orderId': str(self.booking.booking_id)},
+        })
+        return self.client.post(
+            reverse('monei-webhook'), body,
+            content_type='application/json',
+            HTTP_MONEI_SIGNATURE='t=1,v1=test'
+        )
+
+    @mock.patch('agent.views.issue_ticket_task')
+    def test_replayed_event_is_processed_once(self, ticket_task):
+        first = self.post_event()
+        replay = self.post_event()
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.json()['message'], 'Already processed')
+        ticket_task.delay.assert_called_once_with(str(self.booking.booking_id))
+        self.assertEqual(WebhookLog.objects.filter(monei_event_id='evt_1').count(), 1)
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, 'PAID')
+        self.assertEqual(self.booking.ticket_status, 'ISSUING')
+
+    def test_failed_event_is_processed_on_retry(self):
+        with mock.patch.object(MoneiWebhookView, '_handle_payment_failure', side_effect=RuntimeError('db down')):
+            failed = self.post_event('payment.failed')
+
+        self.assertEqual(failed.status_code, 500)
+        self.assertFalse(WebhookLog.objects.get(monei_event_id='evt_1').processed)
+
+        retried = self.post_event('payment.failed')
+
+        self.assertEqual(retried.status_code, 200)
+        self.assertNotEqual(retried.json().get('message'), 'Already processed')
+        # The retry reuses the log row written by the failed delivery
+        log_entry = WebhookLog.objects.get(monei_event_id='evt_1')
+        self.assertTrue(log_entry.processed)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, 'FAILED')
+
+
+    def test_payment_of_another_booking_is_left_alone(self):
+        other = make_booking(mistifly_order_id='MF-ORDER-2')
+        payment = Payment.objects.create(booking=other, monei_payment_id='pay_1', amount='450.00')
+
+        self.post_event('payment.failed')
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'PENDING')
+
+class IssueTicketTaskTests(TestCase):
+    """Background ticketing after payment"""
+
+    def setUp(self):
+        self.booking = make_booking(payment_status='PAID', ticket_status='ISSUING')
+
+    @mock.patch('agent.tasks.get_handlers')
+    def test_marks_booking_failed_when_retries_run_out(self, get_handlers):
+        issue_ticket = get_handlers.return_value.mistifly.issue_ticket
+        issue_ticket.side_effect = RuntimeError('Mistifly unavailable')
+
+        # Final attempt: no retry left, so the failure is recorded instead of re-queued
+        issue_ticket_task.apply(args=[str(self.booking.booking_id)], retries=issue_ticket_task.max_retries)
+
+        issue_ticket.assert_called_once_with('MF-ORDER-1')
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.ticket_status, 'FAILED')
+        self.assertEqual(self.booking.notes, 'PAID BUT TICKET FAILED: Mistifly unavailable')
+        self.assertEqual(self.booking.ticket_numbers, [])
+
+    @mock.patch('agent.tasks.get_handlers')
+    def test_issues_ticket(self, get_handlers):
+        get_handlers.return_value.mistifly.issue_ticket.return_value = {
+            'ticket_numbers': ['0831234567890'],
+            'airline_pnr': 'ABC123',
+        }
+
+        issue_ticket_task.apply(args=[str(self.booking.booking_id)])
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.ticket_status, 'ISSUED')
+        self.assertEqual(self.booking.ticket_numbers, ['0831234567890'])
+        self.assertEqual(self.booking.airline_pnr, 'ABC123')
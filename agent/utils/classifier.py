@@ -5,124 +5,73 @@ Determines if query is simple (flight/tour/place) or complex (needs agent)
 """
 
 import re
-from datetime import datetime
-from typing import Dict, Optional, List
-
-
-
-@classmethod
-def classify(cls, query: str) -> Dict:
-    query_lower = query.lower().strip()
-    
-    # ✅ IMPROVED: Only classify as greeting if there's NO search intent
-    # Check for search intent FIRST
-    flight_score = cls._score_patterns(query_lower, cls.FLIGHT_PATTERNS)
-    tour_score = cls._score_patterns(query_lower, cls.TOUR_PATTERNS)
-    place_score = cls._score_patterns(query_lower, cls.PLACE_PATTERNS)
-    
-    has_search_intent = (flight_score + tour_score + place_score) > 0
-    
-    # Only classify as pure greeting if NO search intent
-    if not has_search_intent and cls._is_greeting_or_conversational(query_lower):
-        return {
-            'type': 'unknown',
-            'confidence': 0.0,
-            'params': {},
-            'use_agent': True,
-            'reason': 'Pure greeting - no search intent'
-        }
+import sys
+from collections import namedtuple
+from types import MappingProxyType
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Optional, Pattern, Tuple
 
-    if cls._is_complex_query(query_lower):
-        return {
-            'type': 'complex',
-            'confidence': 0.9,
-            'params': {},
-            'use_agent': True,
-            'reason': 'Multi-step reasoning required'
-        }
 
-    scores = {
-        'flight': flight_score,
-        'tour': tour_score,
-        'place': place_score
-    }
+# A query normalised once per classify(): lowered text, punctuation-stripped tokens, digit flag,
+# and the tokens the user typed in capitals ("LOS", "DXB")
+_Query = namedtuple('_Query', 'text tokens has_digit upper_tokens')
 
-    max_type = max(scores, key=scores.get)
-    max_score = scores[max_type]
 
-    # ✅ FIX: Ensure zero-score queries always return 'unknown' and use agent
-    if max_score < 1:
-        return {
-            'type': 'unknown',
-            'confidence': 0.0,
-            'params': {},
-            'use_agent': True,
-            'reason': 'Query type unclear - no matching patterns found'
-        }
+def _build_master_re(categories: Dict[str, Tuple[Pattern, ...]]) -> Pattern:
+    """
+    Fold every category pattern into one regex matched once at position 0.
 
-    if max_type == 'flight':
-        params = cls._extract_flight_params(query_lower)
-        pattern_len = len(cls.FLIGHT_PATTERNS)
-    elif max_type == 'tour':
-        params = cls._extract_tour_params(query_lower)
-        pattern_len = len(cls.TOUR_PATTERNS)
-    else:
-        params = cls._extract_place_params(query_lower)
-        pattern_len = len(cls.PLACE_PATTERNS)
+    Each pattern sits in its own optional lookahead, so it is tried independently
+    (exactly like a separate re.search) and its named group is set only if it hits.
+    """
+    parts = []
+    for category, patterns in categories.items():
+        for i, pattern in enumerate(patterns):
+            parts.append(rf"(?=(?:[\s\S]*?(?P<{category}_{i}>{pattern.pattern}))?)")
+    return re.compile("".join(parts))
 
-    required_params = cls._get_required_params(max_type)
-    missing = [p for p in required_params if not params.get(p)]
 
-    confidence = max_score / pattern_len
-
-    # ✅ FIX: If extraction failed or looks wrong, use agent
-    if missing or cls._params_look_invalid(params, max_type):
-        return {
-            'type': max_type,
-            'confidence': confidence,
-            'params': params,
-            'use_agent': True,  # Let agent handle it
-            'reason': f'Params unclear or missing: {missing}'
-        }
-
-    return {
-        'type': max_type,
-        'confidence': confidence,
-        'params': params,
-        'use_agent': False,
-        'reason': 'All required params extracted'
-    }
+def _build_city_trie(airports) -> Dict:
+    """Token trie over city names: {'abu': {'dhabi': {'_code': 'AUH'}}}"""
+    trie = {}
+    for city, code in airports.items():
+        node = trie
+        for token in city.split():
+            node = node.setdefault(token, {})
+        node['_code'] = code
+    return trie
 
 
 class QueryClassifier:
     """Classify user queries without using LLM"""
 
     # Common airports - NOT exhaustive, just hints
-    COMMON_AIRPORTS = {
+    COMMON_AIRPORTS = MappingProxyType({sys.intern(city): code for city, code in {
         'lagos': 'LOS', 'abuja': 'ABV', 'kano': 'KAN', 'port harcourt': 'PHC',
         'dubai': 'DXB', 'abu dhabi': 'AUH', 'doha': 'DOH', 'riyadh': 'RUH',
         'london': 'LHR', 'paris': 'CDG', 'rome': 'FCO', 'amsterdam': 'AMS',
         'new york': 'JFK', 'los angeles': 'LAX', 'chicago': 'ORD',
         'istanbul': 'IST', 'cairo': 'CAI', 'johannesburg': 'JNB',
         'nairobi': 'NBO', 'accra': 'ACC', 'addis ababa': 'ADD'
-    }
+    }.items()})
 
-    FLIGHT_PATTERNS = [
+    FLIGHT_PATTERNS = tuple(re.compile(p) for p in (
         r'\b(flight|flights|fly|flying|plane|ticket|tickets)\b',
         r'\b(from|to|→|->)\b.*(to|from)\b',
         r'\b(depart|departure|leave|leaving|return|returning)\b',
         r'\b(one[- ]?way|round[- ]?trip|roundtrip)\b',
         r'\b(economy|business|first class|premium)\b'
-    ]
+    ))
 
-    TOUR_PATTERNS = [
+    TOUR_PATTERNS = tuple(re.compile(p) for p in (
         r'\b(tour|tours|activity|activities|excursion|sightseeing|guide)\b',
         r'\b(things to do|what to do|attractions|visit|explore|experience)\b',
         r'\b(museum|castle|palace|temple|church|monument|park|safari|cruise)\b',
         r'\b(ticket|entry).*(museum|park|zoo)\b'
-    ]
+    ))
 
-    PLACE_PATTERNS = [
+    PLACE_PATTERNS = tuple(re.compile(p) for p in (
         r'\b(hotel|hotels|accommodation|stay|resort|hostel|inn|lodge)\b',
         r'\b(restaurant|restaurants|cafe|bar|dining|eat|food|dinner|lunch|breakfast)\b',
         r'\b(place|places|spot|spots|location|locations|area|venue)\b', # Generic terms
@@ -130,21 +79,94 @@ class QueryClassifier:
         r'\b(near|close to|nearby)\b',
         r'\b(mall|cinema|club|lounge|beach|spa|gym|market|shop|store)\b'
 
-    ]
-
-    COMPLEX_INDICATORS = [
+    ))
+
+    CONVERSATIONAL_PATTERNS = tuple(re.compile(p) for p in (
+        r'\b(hey|hi|hello|what\'?s up|how are you|thanks|thank you)\b',
+        r'\b(yeah|yes|no|ok|okay|sure|alright)\b',
+        r'^\s*(hey|hi|hello|what\'?s|how)\s+',
+    ))
+
+    # Multi-word city lookup for route extraction
+    CITY_TRIE = _build_city_trie(COMMON_AIRPORTS)
+    CITY_MAX_TOKENS = max(len(city.split()) for city in COMMON_AIRPORTS)
+
+    # Route extraction: tokens that separate origin from destination
+    ROUTE_SEPARATORS = frozenset({'to', '→', '->'})
+    # Lowercase 3-letter tokens accepted as codes without "from" or capitals
+    KNOWN_AIRPORT_CODES = frozenset(code.lower() for code in COMMON_AIRPORTS.values()) | frozenset({
+        'lgw', 'stn', 'ory', 'jed', 'bcn', 'fra', 'muc', 'hkg', 'nrt',
+        'atl', 'dfw', 'sfo', 'ewr', 'yyz', 'cpt', 'kgl', 'ebb', 'dss'
+    })
+    # Short words that must never be read as a 3-letter airport code
+    ROUTE_STOPWORDS = frozenset({
+        'the', 'and', 'for', 'fly', 'get', 'see', 'new', 'any', 'one', 'two',
+        'few', 'our', 'you', 'all', 'via', 'buy', 'can', 'out', 'now', 'day'
+    })
+
+    # Extraction patterns
+    LEFTOVER_PREPOSITION_RE = re.compile(r'(?:^| )(?:to|from)(?:$| )')
+
+    DESTINATION_PATTERNS = tuple(re.compile(p) for p in (
+        # "in [City]" or "at [City]"
+        r'\b(?:in|at)\s+([a-z]+(?:\s+[a-z]+)?)\b',
+        # "to [City]" (but stop at prepositions)
+        r'\bto\s+([a-z]+)\b(?!\s+(?:see|do|visit|find|get))',
+    ))
+
+    # Deletes every digit; a query whose length is unchanged by it has no date
+    _DIGITS_DELETE = str.maketrans('', '', '0123456789')
+    DATE_RE = re.compile(
+        r'(\d{1,2})(?:st|nd|rd|th)?\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)'
+    )
+    CABIN_RE = re.compile(r'\b(business|first|premium)\b')
+    # In priority order - see _extract_cabin_class
+    CABIN_CLASSES = MappingProxyType({
+        'business': 'BUSINESS',
+        'first': 'FIRST',
+        'premium': 'PREMIUM_ECONOMY'
+    })
+    PASSENGERS_RE = re.compile(r'(\d+)\s+(?:passengers|people|adults)')
+
+    COMPLEX_INDICATORS = tuple(re.compile(p) for p in (
         r'\b(plan|planning|itinerary|schedule)\b',
         r'\b(compare|vs|versus|better|best)\b',
         r'\b(recommend|suggest|advice|opinion)\b',
         r'\b(and|also|then|after|before)\b.*\b(and|also|then|after|before)\b',
         r'\b\d+[- ]?(day|night|week)\b.*\b(trip|vacation|holiday)\b',
-    ]
+    ))
+
+    REQUIRED_PARAMS = MappingProxyType({
+        'flight': ('origin', 'destination', 'departure_date'),
+        'tour': ('destination',),
+        'place': ('query',)
+    })
+
+    # One pass over the query scores every category (see _build_master_re)
+    _MASTER_RE = _build_master_re({
+        'flight': FLIGHT_PATTERNS,
+        'tour': TOUR_PATTERNS,
+        'place': PLACE_PATTERNS,
+        'complex': COMPLEX_INDICATORS,
+    })
 
     @classmethod
     def classify(cls, query: str) -> Dict:
-        query_lower = query.lower().strip()
+        # Keyed on today's date too, since relative dates ("5 jan") depend on it
+        # Case is kept in the key: capitals are how users mark a literal airport code
+        result = cls._classify_cached(query.strip(), date.today())
+        # Hand out a copy so callers can't mutate the cached result
+        return {**result, 'params': dict(result['params'])}
 
-        if cls._is_complex_query(query_lower):
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _classify_cached(cls, query: str, today: date) -> Dict:
+        query_lower = query.lower()
+        # Score every category once; the complex check and the type pick share it
+        scores = cls._score_categories(query_lower)
+        flight_score, tour_score, place_score = scores['flight'], scores['tour'], scores['place']
+
+        if cls._is_complex_query(scores['complex'], flight_score + tour_score + place_score):
             return {
                 'type': 'complex',
                 'confidence': 0.9,
@@ -153,18 +175,13 @@ class QueryClassifier:
                 'reason': 'Multi-step reasoning required'
             }
 
-        flight_score = cls._score_patterns(query_lower, cls.FLIGHT_PATTERNS)
-        tour_score = cls._score_patterns(query_lower, cls.TOUR_PATTERNS)
-        place_score = cls._score_patterns(query_lower, cls.PLACE_PATTERNS)
-
-        scores = {
-            'flight': flight_score,
-            'tour': tour_score,
-            'place': place_score
-        }
-
-        max_type = max(scores, key=scores.get)
-        max_score = scores[max_type]
+        # Ties go to the earlier category (flight > tour > place)
+        if flight_score >= tour_score and flight_score >= place_score:
+            max_type, max_score = 'flight', flight_score
+        elif tour_score >= place_score:
+            max_type, max_score = 'tour', tour_score
+        else:
+            max_type, max_score = 'place', place_score
 
         # ✅ FIX: Ensure zero-score queries always return 'unknown' and use agent
         # This prevents conversational queries from being misclassified
@@ -177,14 +194,15 @@ class QueryClassifier:
                 'reason': 'Query type unclear - no matching patterns found'
             }
 
+        q = cls._parse_query(query)
         if max_type == 'flight':
-            params = cls._extract_flight_params(query_lower)
+            params = cls._extract_flight_params(q)
             pattern_len = len(cls.FLIGHT_PATTERNS)
         elif max_type == 'tour':
-            params = cls._extract_tour_params(query_lower)
+            params = cls._extract_tour_params(q)
             pattern_len = len(cls.TOUR_PATTERNS)
         else:
-            params = cls._extract_place_params(query_lower)
+            params = cls._extract_place_params(q)
             pattern_len = len(cls.PLACE_PATTERNS)
 
         required_params = cls._get_required_params(max_type)
@@ -219,7 +237,7 @@ class QueryClassifier:
             if not dest or len(dest) < 3:
                 return True
             # Check for leftover words like "to", "from", etc.
-            if any(word in dest.lower() for word in ['to ', ' to', 'from ', ' from']):
+            if cls.LEFTOVER_PREPOSITION_RE.search(dest.lower()):
                 return True
         
         elif query_type == 'flight':
@@ -236,12 +254,7 @@ class QueryClassifier:
                 return True
             
             # Check if query looks like conversational text (greetings, casual chat)
-            conversational_indicators = [
-                r'\b(hey|hi|hello|what\'?s up|how are you|thanks|thank you)\b',
-                r'\b(yeah|yes|no|ok|okay|sure|alright)\b',
-                r'^\s*(hey|hi|hello|what\'?s|how)\s+',
-            ]
-            if any(re.search(pattern, query.lower()) for pattern in conversational_indicators):
+            if any(p.search(query.lower()) for p in cls.CONVERSATIONAL_PATTERNS):
                 return True
             
             # Check if query is too generic (just common words)
@@ -253,52 +266,64 @@ class QueryClassifier:
         return False
 
     @classmethod
-    def _is_complex_query(cls, query: str) -> bool:
-        matches = sum(1 for p in cls.COMPLEX_INDICATORS if re.search(p, query))
-
-        if matches >= 2:
-            intent_score = (
-                cls._score_patterns(query, cls.FLIGHT_PATTERNS) +
-                cls._score_patterns(query, cls.TOUR_PATTERNS) +
-                cls._score_patterns(query, cls.PLACE_PATTERNS)
-            )
+    def _is_complex_query(cls, complex_matches: int, intent_score: int) -> bool:
+        """Several planning/comparison cues and little direct search intent"""
+        if complex_matches >= 2:
             return intent_score < 2
 
         return False
 
     @classmethod
-    def _score_patterns(cls, query: str, patterns: List[str]) -> int:
-        return sum(1 for p in patterns if re.search(p, query))
+    def _parse_query(cls, query: str) -> _Query:
+        """Tokenize and flag the query once for all extractors"""
+        raw_tokens = tuple(t.strip('.,!?') for t in query.split())
+        query_lower = query.lower()
+        return _Query(
+            text=query_lower,
+            tokens=tuple(t.lower() for t in raw_tokens),
+            # Deleting digits changes the length only if there were any
+            has_digit=len(query_lower.translate(cls._DIGITS_DELETE)) != len(query_lower),
+            upper_tokens=frozenset(t.lower() for t in raw_tokens if t.isupper()),
+        )
+
+    @classmethod
+    def _score_categories(cls, query: str) -> Dict[str, int]:
+        """Number of matching patterns per category, from a single regex call."""
+        scores = {'flight': 0, 'tour': 0, 'place': 0, 'complex': 0}
+        for name, value in cls._MASTER_RE.match(query).groupdict().items():
+            if value is not None:
+                scores[name.rsplit('_', 1)[0]] += 1
+        return scores
 
     @classmethod
-    def _extract_flight_params(cls, query: str) -> Dict:
+    def _extract_flight_params(cls, q: _Query) -> Dict:
         params = {}
 
-        origin, destination = cls._extract_route(query)
+        origin, destination = cls._extract_route(q)
         if origin:
             params['origin'] = origin
         if destination:
             params['destination'] = destination
 
-        date_info = cls._extract_dates(query)
+        date_info = cls._extract_dates(q)
         if date_info.get('departure'):
             params['departure_date'] = date_info['departure']
 
-        cabin = cls._extract_cabin_class(query)
+        cabin = cls._extract_cabin_class(q.text)
         if cabin:
             params['cabin_class'] = cabin
 
-        params['adults'] = cls._extract_passenger_count(query)
+        params['adults'] = cls._extract_passenger_count(q)
         params['limit'] = 5
 
         return params
 
     @classmethod
-    def _extract_tour_params(cls, query: str) -> Dict:
+    def _extract_tour_params(cls, q: _Query) -> Dict:
         """Extract tour parameters - FIXED to handle edge cases"""
         params = {}
 
-        destination = cls._extract_destination(query)
+        destination = cls._extract_destination(q.text)
         if destination:
             # Clean up the destination
             destination = destination.strip()
@@ -319,11 +344,11 @@ class QueryClassifier:
         return params
 
     @classmethod
-    def _extract_place_params(cls, query: str) -> Dict:
+    def _extract_place_params(cls, q: _Query) -> Dict:
         """Extract place parameters - FIXED"""
         params = {}
 
-        destination = cls._extract_destination(query)
+        destination = cls._extract_destination(q.text)
         if destination:
             # Clean up
             destination = destination.strip()
@@ -334,67 +359,84 @@ class QueryClassifier:
             if len(destination) >= 3:
                 params['query'] = destination
             else:
-                params['query'] = query  # fallback to full query
+                params['query'] = q.text  # fallback to full query
         else:
-            params['query'] = query
+            params['query'] = q.text
 
         params['limit'] = 5
         return params
 
     @classmethod
-    def _extract_route(cls, query: str) -> tuple:
-        """Extract flight route - MORE STRICT"""
-        patterns = [
-            # "from X to Y"
-            r'from\s+([a-z\s]+?)\s+to\s+([a-z\s]+?)(?:\s+on|\s+for|\s+return|\s+next|\s+tomorrow|\s*$)',
-            # "X to Y"
-            r'\b([a-z\s]+?)\s+to\s+([a-z\s]+?)(?:\s+on|\s+for|\s+next|\s+tomorrow|\s*$)',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, query)
-            if match:
-                origin_text = match.group(1).strip()
-                dest_text = match.group(2).strip()
-                
-                # Try to convert to airport codes
-                origin = cls._to_airport_code(origin_text)
-                destination = cls._to_airport_code(dest_text)
-                
-                if origin and destination:
-                    return origin, destination
+    def _extract_route(cls, q: _Query) -> tuple:
+        """Extract flight route from "[from] X to Y" in one pass over the tokens"""
+        for i, token in enumerate(q.tokens):
+            if token not in cls.ROUTE_SEPARATORS:
+                continue
+            origin = cls._city_code_ending_at(q, i)
+            destination = cls._city_code_starting_at(q, i + 1)
+            if origin and destination:
+                return origin, destination
 
         return None, None
 
     @classmethod
-    def _to_airport_code(cls, city: str) -> Optional[str]:
-        """Convert city name to airport code - MORE FLEXIBLE"""
-        city = city.lower().strip()
-        
-        # If already a 3-letter code
-        if len(city) == 3 and city.isalpha():
-            return city.upper()
-        
-        # Check common airports
-        if city in cls.COMMON_AIRPORTS:
-            return cls.COMMON_AIRPORTS[city]
-        
-        # ✅ If not in our list, return None (let agent handle it)
+    def _match_city(cls, tokens: Tuple[str, ...], start: int, stop: int) -> tuple:
+        """Longest city in CITY_TRIE starting at tokens[start] (before stop) -> (code, end)"""
+        node = cls.CITY_TRIE
+        best = (None, start)
+        for pos in range(start, stop):
+            node = node.get(tokens[pos])
+            if node is None:
+                break
+            if '_code' in node:
+                best = (node['_code'], pos + 1)
+        return best
+
+    @classmethod
+    def _city_code_starting_at(cls, q: _Query, start: int) -> Optional[str]:
+        """Airport code for the city right after the separator ("to new york")"""
+        tokens = q.tokens
+        if start >= len(tokens):
+            return None
+        code, _ = cls._match_city(tokens, start, min(start + cls.CITY_MAX_TOKENS, len(tokens)))
+        return code or cls._literal_airport_code(q, start)
+
+    @classmethod
+    def _city_code_ending_at(cls, q: _Query, end: int) -> Optional[str]:
+        """Airport code for the city right before the separator ("abu dhabi to")"""
+        tokens = q.tokens
+        if end == 0:
+            return None
+        # Earliest start first, so the longest city name that ends at the separator wins
+        for start in range(max(end - cls.CITY_MAX_TOKENS, 0), end):
+            code, match_end = cls._match_city(tokens, start, end)
+            if code and match_end == end:
+                return code
+        return cls._literal_airport_code(q, end - 1)
+
+    @classmethod
+    def _literal_airport_code(cls, q: _Query, index: int) -> Optional[str]:
+        """
+        tokens[index] read as a 3-letter code ("LOS", "from abv", "dxb").
+
+        Any short word can sit next to "to" ("for him to rome"), so a bare token only
+        counts when it was typed in capitals, follows "from", or is a known code -
+        anything else stays unresolved and the agent handles the query.
+        """
+        token = q.tokens[index]
+        if len(token) != 3 or not token.isalpha() or token in cls.ROUTE_STOPWORDS:
+            return None
+        if (token in cls.KNOWN_AIRPORT_CODES or token in q.upper_tokens
+                or (index > 0 and q.tokens[index - 1] == 'from')):
+            return token.upper()
         return None
 
     @classmethod
     def _extract_destination(cls, query: str) -> Optional[str]:
         """Extract destination for tours/places - FIXED TO BE MORE PRECISE"""
         # Try multiple patterns in order of specificity
-        patterns = [
-            # "in [City]" or "at [City]"
-            r'\b(?:in|at)\s+([a-z]+(?:\s+[a-z]+)?)\b',
-            # "to [City]" (but stop at prepositions)
-            r'\bto\s+([a-z]+)\b(?!\s+(?:see|do|visit|find|get))',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, query)
+        for pattern in cls.DESTINATION_PATTERNS:
+            match = pattern.search(query)
             if match:
                 destination = match.group(1).strip()
                 
@@ -405,8 +447,11 @@ class QueryClassifier:
         return None
 
     @classmethod
-    def _extract_dates(cls, query: str) -> Dict:
+    def _extract_dates(cls, q: _Query) -> Dict:
         dates = {}
+        # Most queries mention no day number at all
+        if not q.has_digit:
+            return dates
         today = datetime.now()
 
         month_map = {
@@ -418,10 +463,7 @@ class QueryClassifier:
             'dec': 12, 'december': 12
         }
 
-        match = re.search(
-            r'(\d{1,2})(?:st|nd|rd|th)?\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)',
-            query
-        )
+        match = cls.DATE_RE.search(q.text)
 
         if match:
             day, month_str = match.groups()
@@ -436,23 +478,19 @@ class QueryClassifier:
 
     @classmethod
     def _extract_cabin_class(cls, query: str) -> Optional[str]:
-        if re.search(r'\bbusiness\b', query):
-            return 'BUSINESS'
-        if re.search(r'\bfirst\b', query):
-            return 'FIRST'
-        if re.search(r'\bpremium\b', query):
-            return 'PREMIUM_ECONOMY'
-        return None
+        # Several classes can be mentioned ("premium economy or business"); the higher one wins
+        found = cls.CABIN_RE.findall(query)
+        if not found:
+            return None
+        return next(cabin for word, cabin in cls.CABIN_CLASSES.items() if word in found)
 
     @classmethod
-    def _extract_passenger_count(cls, query: str) -> int:
-        match = re.search(r'(\d+)\s+(?:passengers|people|adults)', query)
+    def _extract_passenger_count(cls, q: _Query) -> int:
+        if not q.has_digit:
+            return 1
+        match = cls.PASSENGERS_RE.search(q.text)
         return int(match.group(1)) if match else 1
 
     @classmethod
-    def _get_required_params(cls, query_type: str) -> List[str]:
-        return {
-            'flight': ['origin', 'destination', 'departure_date'],
-            'tour': ['destination'],
-            'place': ['query']
-        }.get(query_type, [])
\ No newline at end of file
+    def _get_required_params(cls, query_type: str) -> Tuple[str, ...]:
+        return cls.REQUIRED_PARAMS.get(query_type, ())
\ No newline at end of file
@@ -0,0 +1,27 @@
+# agent/utils/ids.py
+"""
+Time-ordered identifiers (UUIDv7, RFC 9562)
+New ids sort by creation time, so B-tree index inserts stay append-mostly
+instead of landing on random pages like uuid4.
+"""
+
+import os
+import time
+import uuid
+
+
+def uuid7() -> uuid.UUID:
+    """UUIDv7: 48-bit unix-ms timestamp, then 74 random bits (stdlib uuid7 arrives in 3.14)"""
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), 'big')
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76                                # version
+    value |= ((rand >> 62) & 0xFFF) << 64             # rand_a (12 bits)
+    value |= 0b10 << 62                               # RFC 4122 variant
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF             # rand_b (62 bits)
+    return uuid.UUID(int=value)
+
+
+def new_session_id() -> str:
+    """Session id in the existing 32-char hex format, time-ordered"""
+    return uuid7().hex
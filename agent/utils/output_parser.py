@@ -5,10 +5,22 @@ Output parser to ensure consistent JSON responses from both agent and direct han
 
 import json
 import logging
+import re
 from typing import Dict, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# raw_decode parses one JSON value from an offset and reports where it ended
+_DECODER = json.JSONDecoder()
+
+# Tool result prefixes, matched in one pass instead of one str.find per prefix
+_RESULT_PREFIX_RE = re.compile(
+    r'(?:TOUR_SEARCH|PLACES_SEARCH|PLACE_DETAILS|FLIGHT_SEARCH|FLIGHT_PRICE|FLIGHT_BOOKING)_RESULT:'
+)
+
+# Skips whitespace by offset, so the output never has to be strip()-copied
+_WHITESPACE_RE = re.compile(r'\s*')
+
 
 class AgentOutputParser:
     """Parse and normalize agent outputs to match direct handler format"""
@@ -22,6 +34,10 @@ class AgentOutputParser:
             - Dict if JSON found
             - None if no JSON found
         """
+        # Plain prose (the common case) can't contain any of the formats below
+        if '{' not in agent_output:
+            return None
+
         # Try multiple extraction strategies
         strategies = [
             AgentOutputParser._extract_prefixed_json,
@@ -40,128 +56,85 @@ class AgentOutputParser:
     @staticmethod
     def _extract_prefixed_json(text: str) -> Optional[Dict]:
         """Extract JSON after known prefixes like 'FLIGHT_SEARCH_RESULT:'"""
-        prefixes = [
-            "TOUR_SEARCH_RESULT:",
-            "PLACES_SEARCH_RESULT:",
-            "PLACE_DETAILS_RESULT:",
-            "FLIGHT_SEARCH_RESULT:",
-            "FLIGHT_PRICE_RESULT:",
-            "FLIGHT_BOOKING_RESULT:",
-        ]
-        
-        for prefix in prefixes:
-            if prefix in text:
-                try:
-                    json_start = text.find(prefix) + len(prefix)
-                    json_part = text[json_start:].strip()
-                    
-                    # Find matching closing brace
-                    brace_count = 0
-                    json_end = 0
-                    for i, char in enumerate(json_part):
-                        if char == '{':
-                            brace_count += 1
-                        elif char == '}':
-                            brace_count -= 1
-                            if brace_count == 0:
-                                json_end = i + 1
-                                break
-                    
-                    if json_end > 0:
-                        json_str = json_part[:json_end]
-                        return json.loads(json_str)
-                except (json.JSONDecodeError, ValueError) as e:
-                    logger.debug(f"Failed to parse prefixed JSON: {e}")
-                    continue
+        for match in _RESULT_PREFIX_RE.finditer(text):
+            try:
+                # First object after the prefix; raw_decode finds its end in C
+                # (and, unlike brace counting, ignores braces inside strings)
+                json_start = text.find('{', match.end())
+                if json_start >= 0:
+                    return _DECODER.raw_decode(text, json_start)[0]
+            except (json.JSONDecodeError, ValueError) as e:
+                logger.debug(f"Failed to parse prefixed JSON: {e}")
+                continue
         
         return None
     
     @staticmethod
     def _extract_embedded_json(text: str) -> Optional[Dict]:
-        """Extract JSON embedded in text using regex"""
-        import re
-        
-        # Pattern to match JSON objects
-        pattern = r'\{(?:[^{}]|(?:\{(?:[^{}]|(?:\{[^{}]*\}))*\}))*\}'
-        
-        matches = re.finditer(pattern, text, re.DOTALL)
-        
-        for match in matches:
+        """Extract the first response-shaped JSON object embedded in text"""
+        # Try raw_decode at each '{' - handles any nesting depth without regex backtracking
+        pos = text.find('{')
+        while pos >= 0:
             try:
-                json_str = match.group(0)
-                parsed = json.loads(json_str)
-                
-                # Validate it looks like a valid response
-                if any(key in parsed for key in ['success', 'flights', 'tours', 'places', 'message']):
-                    return parsed
+                parsed, end = _DECODER.raw_decode(text, pos)
             except json.JSONDecodeError:
+                pos = text.find('{', pos + 1)
                 continue
-        
+
+            # Validate it looks like a valid response
+            if isinstance(parsed, dict) and any(
+                key in parsed for key in ['success', 'flights', 'tours', 'places', 'message']
+            ):
+                return parsed
+            # Skip past this object, as the old top-level match did
+            pos = text.find('{', end)
+
         return None
     
     @staticmethod
     def _extract_pure_json(text: str) -> Optional[Dict]:
         """Try to parse entire text as JSON"""
-        text = text.strip()
+        start = _WHITESPACE_RE.match(text).end()
         
-        if text.startswith('{') and text.endswith('}'):
+        if text.startswith('{', start):
             try:
-                return json.loads(text)
+                parsed, end = _DECODER.raw_decode(text, start)
             except json.JSONDecodeError:
-                pass
+                return None
+            # Only whitespace may follow the object
+            if _WHITESPACE_RE.match(text, end).end() == len(text):
+                return parsed
         
         return None
     
+    # First matching key decides the response type; extra fields get these defaults
+    _TYPE_DISPATCH = (
+        ('flights', 'flight_search', (('search_params', {}),)),
+        ('tours', 'tour_search', (('destination', {}),)),
+        ('places', 'place_search', ()),
+        ('itinerary', 'itinerary', ()),
+        ('booking', 'booking', (('payment', {}),)),
+    )
+
     @staticmethod
     def _normalize_structure(data: Dict) -> Dict:
         """
         Normalize the structure to match direct handler format
         Ensures consistent field names and types
         """
-        normalized = {
-            'success': data.get('success', True),
-            'message': data.get('message', ''),
-        }
-        
-        # Detect response type and include appropriate fields
-        if 'flights' in data:
-            normalized['type'] = 'flight_search'
-            normalized['flights'] = data['flights']
-            normalized['search_params'] = data.get('search_params', {})
-            
-        elif 'tours' in data:
-            normalized['type'] = 'tour_search'
-            normalized['tours'] = data['tours']
-            normalized['destination'] = data.get('destination', {})
-            
-        elif 'places' in data:
-            normalized['type'] = 'place_search'
-            normalized['places'] = data['places']
-            
-        elif 'itinerary' in data:
-            # Itinerary/complete trip responses
-            normalized['type'] = 'itinerary'
-            normalized['itinerary'] = data['itinerary']
-            # Preserve any additional itinerary context if present
-            for key in ['segments', 'flights', 'hotels', 'activities', 'trip']:
-                if key in data and key not in normalized:
-                    normalized[key] = data[key]
-            
-        elif 'booking' in data:
-            normalized['type'] = 'booking'
-            normalized['booking'] = data['booking']
-            normalized['payment'] = data.get('payment', {})
-            
-        else:
-            # Generic response
-            normalized['type'] = 'conversational'
-            normalized['output'] = data.get('output', data.get('message', ''))
-        
-        # Preserve other fields
-        for key, value in data.items():
-            if key not in normalized:
-                normalized[key] = value
-        
+        # One C-level merge keeps every original field; success/message only fill gaps
+        normalized = {'success': True, 'message': '', **data}
+
+        for key, response_type, defaults in AgentOutputParser._TYPE_DISPATCH:
+            if key in data:
+                normalized['type'] = response_type
+                for field, default in defaults:
+                    normalized.setdefault(field, dict(default))
+                return normalized
+
+        # Generic response
+        normalized['type'] = 'conversational'
+        normalized['output'] = data.get('output', data.get('message', ''))
         return normalized
 
 
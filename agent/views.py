@@ -1,16 +1,15 @@
 # agent/views.py
 from django.shortcuts import render
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
 from django.utils import timezone
-from django.db import transaction
-from .agent import executor, create_executor_with_memory, agent, tools
-from langchain.memory import ConversationBufferWindowMemory
-from langchain.agents import AgentExecutor
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
 from .models import Conversation, Message, Tour
 from .services.memory import ConversationSearchService
 from .serializers import (
-    ChatRequestSerializer, ChatResponseSerializer, 
-    ConversationSerializer, TourSearchSerializer, 
-    TourSearchResponseSerializer, TourSerializer
+    ChatRequestSerializer,
+    ConversationSerializer, TourSearchSerializer
 )
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -18,36 +17,149 @@ from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from agent.utils.output_parser import parse_agent_output
-import uuid
-import json
+import orjson
+import threading
 import time
+from datetime import datetime, timezone as dt_timezone
 import hashlib
 from django.core.cache import cache
 from .utils.classifier import QueryClassifier
+from .utils.ids import new_session_id
 import logging
 logger = logging.getLogger(__name__)
 from .handlers import get_handlers
+from .renderers import ORJSONRenderer
+from .services.viator import LocalTTLCache
 import re
 
 
+# ================================================================
+# SESSION EXECUTOR CACHE (skip rebuilding the agent executor every turn)
+# ================================================================
+# .agent (LangChain, the OpenAI client, tool schemas) is imported on first
+# agent use rather than at startup, so workers boot fast and processes that
+# only serve the REST search/booking endpoints never load it.
+# DjangoConversationMemory reads history from the DB on each invoke, so a
+# cached executor never serves stale context.
+_executor_cache = LocalTTLCache(maxsize=2048, ttl=1800)
+# Striped build locks: two requests for the same session build one executor,
+# different sessions rarely contend
+_executor_build_locks = [threading.Lock() for _ in range(64)]
+
+
+def _get_session_executor(session_id: str):
+    """Return the memory-backed executor for a session, building it once per TTL window"""
+    session_executor = _executor_cache.get(session_id)
+    if session_executor is not None:
+        return session_executor
+    with _executor_build_locks[hash(session_id) % len(_executor_build_locks)]:
+        session_executor = _executor_cache.get(session_id)
+        if session_executor is None:
+            from .agent import create_executor_with_memory
+            session_executor = create_executor_with_memory(session_id)
+            _executor_cache.set(session_id, session_executor)
+    return session_executor
+
+
+def _conversation_id_cache_key(session_id: str) -> str:
+    return f"conversation_id:{session_id}"
+
+
+def _json_fallback(value):
+    """orjson default for agent payloads: LangChain messages by content, anything else as str"""
+    content = getattr(value, 'content', None)
+    return content if content is not None else str(value)
+
+
+# ================================================================
+# SEARCH RESPONSE CACHE (rendered JSON bytes, keyed by search params)
+# ================================================================
+FLIGHT_SEARCH_CACHE_TTL = 120  # seats/prices move fast - keep this short
+TOUR_SEARCH_CACHE_TTL = 60 * 15
+TOUR_SEARCH_STALE_TTL = 60 * 60 * 24  # last good result, served if Viator is failing
+CONVERSATION_SEARCH_CACHE_TTL = 30  # absorbs repeated/bursty searches without going stale
+CONVERSATION_SEARCH_STALE_TTL = 60 * 10
+
+
+def _search_cache_key(prefix: str, params: dict) -> str:
+    """Stable short key for a set of search params."""
+    raw = orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str)
+    return f"{prefix}:{hashlib.blake2b(raw, digest_size=16).hexdigest()}"
+
+
+def _cached_search_response(cache_key: str):
+    """Return the cached rendered response as-is, or None on a miss."""
+    body = cache.get(cache_key)
+    if body is None:
+        return None
+    return HttpResponse(body, content_type='application/json')
+
+
+def _cache_search_response(cache_key: str, payload: dict, timeout: int, stale_timeout: int = None) -> None:
+    """Cache the payload exactly as it would be rendered to the client.
+    
+    With stale_timeout, also keep a longer-lived copy for _stale_search_response().
+    """
+    body = ORJSONRenderer().render(payload)
+    cache.set(cache_key, body, timeout=timeout)
+    if stale_timeout is not None:
+        cache.set(f"{cache_key}:stale", body, timeout=stale_timeout)
+
+
+def _stale_search_response(cache_key: str):
+    """Last good response for the key after the fresh copy expired, or None."""
+    return _cached_search_response(f"{cache_key}:stale")
+
+
 class ChatView(APIView):
     """Main chat API with smart routing and multi-layer caching"""
     
+    AGENT_CACHE_TTL = 60 * 10  # reuse an agent answer to the same prompt in the same session
+    AGENT_CACHE_MIN_WORDS = 4  # shorter prompts ("yes", "tell me more") lean on the conversation
+    
+    # Words that point back into the conversation ("book the second one", "is it cheaper?")
+    CONTEXT_DEPENDENT_RE = re.compile(
+        r"\b(?:it|its|that|this|these|those|them|they|there|ones?|first|second|third|last|"
+        r"previous|above|same|more|another|else|again|yes|yeah|yep|no|nope|ok|okay|sure)\b",
+        re.IGNORECASE
+    )
+    CONVERSATION_ID_CACHE_TTL = 60 * 60 * 24  # session -> conversation id, skips the get_or_create SELECT
+    
+    # Greetings, thanks and acknowledgements with no search intent
+    PURE_GREETING_RE = re.compile(
+        r'^\s*(?:(?P<greeting>hey+|hi+|hello+|howdy|sup|yo)'
+        r'|(?P<thanks>thanks?|thank you|thx)'
+        r'|(?P<ack>ok|okay|sure|alright|cool|yes|yeah|yep|nope|no))\s*$',
+        re.IGNORECASE
+    )
+    # Replies for PURE_GREETING_RE matches - these never need the LLM
+    CANNED_REPLIES = {
+        'greeting': "Hi there! I can help you find flights, tours and places to visit. Where would you like to go?",
+        'thanks': "You're welcome! Let me know if there's anything else I can help you plan.",
+        'ack': "Got it! Would you like me to search for flights, tours or places next?",
+    }
+    
     def post(self, request, *args, **kwargs):
         """Handle chat messages with intelligent routing"""
         start_time = time.time()
-        serializer = ChatRequestSerializer(data=request.data)
-        
-        if not serializer.is_valid():
-            return Response({
-                "error": "Invalid input data",
-                "details": serializer.errors,
-                "success": False
-            }, status=status.HTTP_400_BAD_REQUEST)
+        fast_input = self._parse_plain_request(request.data)
+        if fast_input is None:
+            serializer = ChatRequestSerializer(data=request.data)
+            
+            if not serializer.is_valid():
+                return Response({
+                    "error": "Invalid input data",
+                    "details": serializer.errors,
+                    "success": False
+                }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            user_input = serializer.validated_data['input']
-            session_id = serializer.validated_data.get('session_id') or str(uuid.uuid4())
+            if fast_input is not None:
+                user_input, session_id = fast_input
+            else:
+                user_input = serializer.validated_data['input']
+                session_id = serializer.validated_data.get('session_id')
+            session_id = session_id or new_session_id()
             
             # ================================================================
             # LAYER 2: QUERY CLASSIFICATION (Smart routing) - DO THIS FIRST
@@ -59,28 +171,50 @@ class ChatView(APIView):
             # ================================================================
             # ✅ FIX: Build cache key with classification to prevent type mismatches
             cache_key = self._build_cache_key(session_id, user_input, classification)
-            cached_response = cache.get(cache_key)
             
-            if cached_response:
-                duration = time.time() - start_time
-                logger.info(f"[CACHE HIT] View-level cache hit! Duration: {duration*1000:.0f}ms, Key: {cache_key[:50]}...")
+            # Failed direct-handler responses are shared across sessions, so a supplier outage
+            # short-circuits every caller for a few seconds instead of one session
+            negative_cache_key = self._build_negative_cache_key(user_input, classification)
+            
+            # Rephrasings of the same search ("NYC to LAX" / "New York to Los Angeles")
+            # resolve to the same params, so fall back to a params-keyed lookup
+            intent_cache_key = self._build_intent_cache_key(session_id, classification)
+            
+            # Every candidate entry in one Redis round trip; hits are taken in priority order
+            cached = cache.get_many([key for key in (negative_cache_key, cache_key, intent_cache_key) if key])
+            
+            cached_error = cached.get(negative_cache_key) if negative_cache_key else None
+            if cached_error is not None:
+                cached_response = orjson.loads(cached_error)
+                if cached_response.get('session_id') != session_id:
+                    # Shared error entry from another session
+                    cached_response['session_id'] = session_id
+                    cached_response.pop('message_id', None)
                 cached_response['cached'] = True
-                cached_response['duration_ms'] = int(duration * 1000)
+                cached_response['duration_ms'] = int((time.time() - start_time) * 1000)
+                logger.info("[CACHE HIT] Shared error response for %s query", classification['type'])
                 return Response(cached_response, status=status.HTTP_200_OK)
-            logger.info(f"[CLASSIFIER] Type: {classification['type']}, Use Agent: {classification['use_agent']}, Confidence: {classification['confidence']:.2f}")
             
-            # Get or create conversation
-            conversation, created = Conversation.objects.get_or_create(
-                session_id=session_id,
-                defaults={'created_at': timezone.now()}
-            )
+            cached_body = cached.get(cache_key)
+            if cached_body is None and intent_cache_key:
+                cached_body = cached.get(intent_cache_key)
             
-            # Save user message
-            user_message = Message.objects.create(
-                conversation=conversation,
+            if cached_body is not None:
+                duration = time.time() - start_time
+                logger.info("[CACHE HIT] View-level cache hit! Duration: %.0fms, Key: %.50s...", duration * 1000, cache_key)
+                # Append the per-hit fields to the stored JSON object instead of decoding it
+                body = cached_body[:-1] + f',"cached":true,"duration_ms":{int(duration * 1000)}}}'.encode()
+                return HttpResponse(body, content_type='application/json')
+            logger.info("[CLASSIFIER] Type: %s, Use Agent: %s, Confidence: %.2f", classification['type'], classification['use_agent'], classification['confidence'])
+            
+            # Get or create conversation (id cached per session)
+            conversation_id = self._get_conversation_id(session_id)
+            
+            # User message is written together with the reply once the handler returns
+            user_message = Message(
+                conversation_id=conversation_id,
                 message_type='user',
-                content=user_input,
-                timestamp=timezone.now()
+                content=user_input
             )
             
             # ================================================================
@@ -88,35 +222,35 @@ class ChatView(APIView):
             # ================================================================
             if classification['use_agent']:
                 # Complex query - use agent
-                logger.info(f"[ROUTER] Using AGENT: {classification['reason']}")
+                logger.info("[ROUTER] Using AGENT: %s", classification['reason'])
                 response_data = self._handle_with_agent(
                     session_id, 
                     user_input, 
-                    conversation,
                     classification
                 )
             else:
                 # Simple query - use direct handler (FAST PATH)
-                logger.info(f"[ROUTER] Using DIRECT HANDLER: {classification['type']}")
+                logger.info("[ROUTER] Using DIRECT HANDLER: %s", classification['type'])
                 response_data = self._handle_with_direct_handler(
                     classification, 
-                    conversation
+                    session_id,
+                    user_input
                 )
             
             # ================================================================
             # SAVE RESPONSE & CACHE
             # ================================================================
-            # Save assistant message
-            assistant_message = Message.objects.create(
-                conversation=conversation,
+            # Save both messages in one transaction
+            assistant_message = Message(
+                conversation_id=conversation_id,
                 message_type='assistant',
-                content=json.dumps(response_data) if isinstance(response_data, dict) else str(response_data),
-                timestamp=timezone.now(),
+                content=orjson.dumps(response_data, default=_json_fallback, option=orjson.OPT_NON_STR_KEYS).decode() if isinstance(response_data, dict) else str(response_data),
                 metadata={
                     'classification': classification,
                     'handler_type': 'agent' if classification['use_agent'] else 'direct'
                 }
             )
+            self._save_turn(session_id, [user_message, assistant_message])
             
             # Add metadata
             duration = time.time() - start_time
@@ -153,26 +287,36 @@ class ChatView(APIView):
                 # If query was 'unknown' but response is a search type, don't cache
                 if query_type == 'unknown' and response_type in ['flight_search', 'tour_search', 'place_search']:
                     should_cache = False
-                    logger.warning(f"[CACHE] Skipping cache - type mismatch: query='{query_type}' vs response='{response_type}'")
+                    logger.warning("[CACHE] Skipping cache - type mismatch: query='%s' vs response='%s'", query_type, response_type)
             
+            # Serialized once with orjson; both keys share the same bytes
             if should_cache:
-                cache.set(cache_key, response_data, timeout=300)
-                logger.info(f"[CACHE] Cached successful response (type: {response_data.get('type', 'unknown')})")
+                cached_bytes = self._render_for_cache(response_data)
+                cache_entries = {cache_key: cached_bytes}
+                if intent_cache_key:
+                    cache_entries[intent_cache_key] = cached_bytes
+                # set_many pipelines both writes into one Redis round trip
+                cache.set_many(cache_entries, timeout=300)
+                logger.info("[CACHE] Cached successful response (type: %s)", response_data.get('type', 'unknown'))
             else:
                 # Cache errors for only 10 seconds to handle transient issues
                 if not response_data.get('success', True):
-                    cache.set(cache_key, response_data, timeout=10)
-                    logger.warning(f"[CACHE] Cached error response for 10s only (success=False)")
+                    cached_bytes = self._render_for_cache(response_data)
+                    error_entries = {cache_key: cached_bytes}
+                    if negative_cache_key:
+                        error_entries[negative_cache_key] = cached_bytes
+                    cache.set_many(error_entries, timeout=10)
+                    logger.warning("[CACHE] Cached error response for 10s only (success=False)")
                 else:
-                    logger.info(f"[CACHE] Skipped caching due to validation")
+                    logger.info("[CACHE] Skipped caching due to validation")
             
-            logger.info(f"[PERF] Total duration: {duration*1000:.0f}ms, Type: {classification['type']}, Handler: {response_data['handler']}")
+            logger.info("[PERF] Total duration: %.0fms, Type: %s, Handler: %s", duration * 1000, classification['type'], response_data['handler'])
             
             return Response(response_data, status=status.HTTP_200_OK)
                 
         except Exception as e:
             duration = time.time() - start_time
-            logger.error(f"[ERROR] Exception after {duration*1000:.0f}ms: {e}", exc_info=True)
+            logger.error("[ERROR] Exception after %.0fms: %s", duration * 1000, e, exc_info=True)
             error_msg = self._format_error_message(str(e))
             return Response({
                 "error": f"An error occurred: {error_msg}",
@@ -186,7 +330,7 @@ class ChatView(APIView):
         # Hash the input to keep key short
         # ✅ FIX: Include classification type in cache key to prevent type mismatches
         input_normalized = user_input.lower().strip()
-        input_hash = hashlib.md5(input_normalized.encode()).hexdigest()
+        input_hash = hashlib.blake2b(input_normalized.encode(), digest_size=16).hexdigest()
         
         # Include classification type if available to prevent cache collisions
         # between different query types with similar text
@@ -196,8 +340,77 @@ class ChatView(APIView):
         
         return f"chat_response:{session_id}:{input_hash}"
     
+    def _render_for_cache(self, response_data: dict) -> bytes:
+        """JSON bytes for the view-level cache, minus the per-hit fields added on read"""
+        payload = {k: v for k, v in response_data.items() if k not in ('cached', 'duration_ms')}
+        return orjson.dumps(payload, default=_json_fallback, option=orjson.OPT_NON_STR_KEYS)
+    
+    def _build_negative_cache_key(self, user_input: str, classification: dict):
+        """Session-independent key for short-lived error responses, or None for agent-routed queries"""
+        # An agent reply depends on the session's history ("book it"), so its errors aren't shared
+        if classification['use_agent']:
+            return None
+        raw = user_input.lower().strip().encode()
+        return f"chat_error:{classification['type']}:{hashlib.blake2b(raw, digest_size=16).hexdigest()}"
+    
+    def _build_intent_cache_key(self, session_id: str, classification: dict):
+        """Cache key from extracted search params, or None for agent-routed queries"""
+        # Only direct-handler queries are fully determined by their params
+        if classification['use_agent']:
+            return None
+        raw = orjson.dumps(classification['params'], option=orjson.OPT_SORT_KEYS, default=str)
+        params_hash = hashlib.blake2b(raw, digest_size=16).hexdigest()
+        return f"chat_intent:{session_id}:{classification['type']}:{params_hash}"
+    
 
-    def _handle_with_direct_handler(self, classification: dict, conversation) -> dict:
+    def _parse_plain_request(self, data):
+        """(input, session_id) when the body is plainly valid, else None for full serializer validation"""
+        # Same rules as ChatRequestSerializer, checked inline for the common well-formed request
+        if not isinstance(data, dict):
+            return None
+        user_input = data.get('input')
+        session_id = data.get('session_id')
+        if not isinstance(user_input, str):
+            return None
+        if session_id is None and 'session_id' in data:
+            return None  # explicit null - let the serializer report it
+        if session_id is not None and not isinstance(session_id, str):
+            return None
+        user_input = user_input.strip()
+        if not user_input or len(user_input) > 2000:
+            return None
+        if session_id is not None:
+            session_id = session_id.strip()
+            if not session_id or len(session_id) > 255:
+                return None
+        return user_input, session_id
+    
+    def _get_conversation_id(self, session_id: str) -> int:
+        """Conversation id for a session, creating the conversation on first use"""
+        cache_key = _conversation_id_cache_key(session_id)
+        conversation_id = cache.get(cache_key)
+        if conversation_id is None:
+            conversation, created = Conversation.objects.get_or_create(session_id=session_id)
+            conversation_id = conversation.id
+            cache.set(cache_key, conversation_id, timeout=self.CONVERSATION_ID_CACHE_TTL)
+        return conversation_id
+    
+    def _save_turn(self, session_id: str, messages: list) -> None:
+        """Insert a turn's messages in one statement"""
+        try:
+            with transaction.atomic():
+                Message.objects.bulk_create(messages)
+        except IntegrityError:
+            # Cached id points at a conversation deleted outside delete_conversation
+            logger.warning("[CHAT] Stale conversation id for session %s, re-resolving", session_id)
+            cache.delete(_conversation_id_cache_key(session_id))
+            conversation_id = self._get_conversation_id(session_id)
+            for message in messages:
+                message.conversation_id = conversation_id
+            with transaction.atomic():
+                Message.objects.bulk_create(messages)
+    
+    def _handle_with_direct_handler(self, classification: dict, session_id: str, user_input: str) -> dict:
         """Handle simple queries with direct handlers (NO LLM)"""
         handlers = get_handlers()
         query_type = classification['type']
@@ -212,126 +425,104 @@ class ChatView(APIView):
                 result = handlers.handle_place_search(params)
             else:
                 # Unknown type - use agent
-                logger.warning(f"[Direct Handler] Unknown type '{query_type}' - using agent")
-                user_message = conversation.messages.filter(message_type='user').last()
-                original_query = user_message.content if user_message else ""
+                logger.warning("[Direct Handler] Unknown type '%s' - using agent", query_type)
                 return self._handle_with_agent(
-                    conversation.session_id,
-                    original_query,
-                    conversation,
+                    session_id,
+                    user_input,
                     classification  # Pass the classification we already have
                 )
             
             # ✅ CHECK FOR FALLBACK FLAG
             if result.get('_use_agent_fallback'):
-                logger.info(f"[Direct Handler] Fallback triggered: {result.get('reason')} - using agent")
-                # Get the original user message
-                user_message = conversation.messages.filter(message_type='user').last()
-                original_query = user_message.content if user_message else ""
-                
+                logger.info("[Direct Handler] Fallback triggered: %s - using agent", result.get('reason'))
                 return self._handle_with_agent(
-                    conversation.session_id,
-                    original_query,
-                    conversation,
+                    session_id,
+                    user_input,
                     classification  # Pass the classification we already have
                 )
             
             return result
             
         except Exception as e:
-            logger.error(f"[Direct Handler] Unexpected error: {e} - falling back to agent")
-            user_message = conversation.messages.filter(message_type='user').last()
-            original_query = user_message.content if user_message else ""
-            
+            logger.error("[Direct Handler] Unexpected error: %s - falling back to agent", e)
             return self._handle_with_agent(
-                conversation.session_id,
-                original_query,
-                conversation,
+                session_id,
+                user_input,
                 classification  # Pass the classification we already have
             )
         
-    def _handle_with_agent(self, session_id: str, user_input: str, conversation, classification: dict = None) -> dict:
+    def _handle_with_agent(self, session_id: str, user_input: str, classification: dict = None) -> dict:
         """Handle complex queries with LangChain agent"""
-        #  FIX: For PURELY conversational queries (greetings only), don't use conversation memory
-        use_memory = True
-        is_pure_greeting = False
-        
         if classification:
             query_type = classification.get('type', '')
             confidence = classification.get('confidence', 1.0)
             
-            # Check if this is a PURE greeting (no search intent)
-            # Examples: "hey", "hi", "thanks" - these should not use memory
-            # Counter-examples: "hey find me restaurants" - these SHOULD use memory
+            # PURE greetings (no search intent) get a canned reply without an LLM round trip
+            # Examples: "hey", "hi", "thanks"
+            # Counter-examples: "hey find me restaurants" - these still go to the agent
             if query_type == 'unknown' and confidence < 0.5:
-                # Check if user_input is PURELY greeting (very short, no search keywords)
-                user_input_lower = user_input.lower().strip()
-                
-                # List of pure greeting patterns
-                pure_greetings = [
-                    r'^\s*(hey+|hi+|hello+|howdy|sup|yo)\s*$',
-                    r'^\s*(thanks?|thank you|thx)\s*$',
-                    r'^\s*(ok|okay|sure|alright|cool)\s*$',
-                    r'^\s*(yes|yeah|yep|nope|no)\s*$',
-                ]
-                
-                is_pure_greeting = any(re.search(pattern, user_input_lower, re.IGNORECASE) for pattern in pure_greetings)
-                
-                if is_pure_greeting:
-                    use_memory = False
-                    logger.info(f"[AGENT] Pure greeting detected, disabling memory: '{user_input[:50]}'")
+                greeting = self.PURE_GREETING_RE.match(user_input)
+                if greeting:
+                    logger.info("[AGENT] Pure greeting detected, skipping LLM: '%.50s'", user_input)
+                    reply = self.CANNED_REPLIES[greeting.lastgroup]
+                    return {
+                        'success': True,
+                        'type': 'conversational',
+                        'message': reply,
+                        'output': reply
+                    }
         
-        # Create executor with or without memory based on query type
-        if use_memory:
-            session_executor = create_executor_with_memory(session_id)
-        else:
-            # Create executor without memory for fresh context
-            memory = ConversationBufferWindowMemory(memory_key="chat_history", return_messages=True, k=0)
-            session_executor = AgentExecutor(agent=agent, tools=tools, verbose=True, memory=memory)
+        # Exact-prompt cache: the same self-contained question in the same session skips the LLM
+        agent_cache_key = self._build_agent_cache_key(session_id, user_input)
+        if agent_cache_key is not None:
+            cached_agent_response = cache.get(agent_cache_key)
+            if cached_agent_response is not None:
+                logger.info("[AGENT] Cache hit, skipping LLM: '%.50s'", user_input)
+                return cached_agent_response
         
         # Invoke agent
+        session_executor = _get_session_executor(session_id)
         result = session_executor.invoke({"input": user_input})
         ai_response = result.get("output", "Sorry, I couldn't process that.")
         
-        logger.info(f"[AGENT] Raw response: {ai_response[:200]}...")
+        logger.info("[AGENT] Raw response: %.200s...", ai_response)
         
         #  USE THE NEW PARSER
         structured_response = parse_agent_output(ai_response)
         
-        logger.info(f"[AGENT] Parsed response type: {structured_response.get('type')}, success: {structured_response.get('success')}")
+        logger.info("[AGENT] Parsed response type: %s, success: %s", structured_response.get('type'), structured_response.get('success'))
         
-        # FIX: ONLY override if this was a PURE greeting (no search intent)
-        # If query had search intent (like "hey find me restaurants"), DON'T override
-        if is_pure_greeting and classification and classification.get('type') == 'unknown':
-            response_type = structured_response.get('type', '')
-            # Only override if agent returned a search type for a PURE greeting
-            if response_type in ['flight_search', 'tour_search', 'place_search']:
-                logger.warning(f"[AGENT] Pure greeting got search response '{response_type}'. Overriding to conversational.")
-                structured_response['type'] = 'conversational'
-                # Remove search-specific fields
-                for field in ['flights', 'tours', 'places']:
-                    if field in structured_response:
-                        del structured_response[field]
-                # Keep the message if it exists, otherwise use output
-                if 'output' not in structured_response and 'message' in structured_response:
-                    structured_response['output'] = structured_response['message']
+        if agent_cache_key is not None and structured_response.get('success', True) is True:
+            cache.set(agent_cache_key, structured_response, timeout=self.AGENT_CACHE_TTL)
         
         return structured_response
+    
+    def _build_agent_cache_key(self, session_id: str, user_input: str):
+        """Cache key for an agent answer to one normalized prompt within a session
+        
+        None for short or anaphoric prompts - their answer depends on the turns before them.
+        """
+        prompt = user_input.strip().lower()
+        if len(prompt.split()) < self.AGENT_CACHE_MIN_WORDS or self.CONTEXT_DEPENDENT_RE.search(prompt):
+            return None
+        raw = f"{session_id}|{prompt}".encode()
+        return f"agent_response:{hashlib.blake2b(raw, digest_size=16).hexdigest()}"
 
 
     
     
+    # (lowercase substring, user-facing message) - first match wins
+    ERROR_MESSAGES = (
+        ("no such table", "Database not properly initialized. Please contact administrator."),
+        ("database is locked", "Database is temporarily unavailable. Please try again."),
+        ("mistifly", "Flight service temporarily unavailable. Please try again."),
+        ("viator", "Tour service temporarily unavailable. Please try again."),
+    )
+    
     def _format_error_message(self, error_str: str) -> str:
         """Format error messages for user display"""
-        if "no such table" in error_str.lower():
-            return "Database not properly initialized. Please contact administrator."
-        elif "database is locked" in error_str.lower():
-            return "Database is temporarily unavailable. Please try again."
-        elif "mistifly" in error_str.lower():
-            return "Flight service temporarily unavailable. Please try again."
-        elif "viator" in error_str.lower():
-            return "Tour service temporarily unavailable. Please try again."
-        return error_str
+        error_lower = error_str.lower()
+        return next((message for needle, message in self.ERROR_MESSAGES if needle in error_lower), error_str)
 
 
 class FlightSearchView(APIView):
@@ -340,8 +531,6 @@ class FlightSearchView(APIView):
     def post(self, request, *args, **kwargs):
         """Search for flights directly using Mistifly API"""
         try:
-            from .services.mistifly import MistiflyService
-            
             # Extract search parameters
             origin = request.data.get('origin', '').upper()
             destination = request.data.get('destination', '').upper()
@@ -358,9 +547,21 @@ class FlightSearchView(APIView):
                     'flights': []
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Search flights
-            mistifly = MistiflyService()
-            flights = mistifly.search_flights(
+            cache_key = _search_cache_key('flt', {
+                'origin': origin,
+                'destination': destination,
+                'departure_date': departure_date,
+                'return_date': return_date,
+                'adults': adults,
+                'cabin_class': cabin_class
+            })
+            cached_response = _cached_search_response(cache_key)
+            if cached_response is not None:
+                logger.info("[Cache HIT] Flight search %s->%s %s", origin, destination, departure_date)
+                return cached_response
+            
+            # Search flights (shared client - keeps its HTTP connection pool warm)
+            flights = get_handlers().mistifly.search_flights(
                 origin=origin,
                 destination=destination,
                 departure_date=departure_date,
@@ -383,13 +584,15 @@ class FlightSearchView(APIView):
                 if isinstance(flight, dict):
                     flight['search_params'] = search_params
             
-            return Response({
+            response_data = {
                 'success': True,
                 'message': f"Found {len(flights)} flights",
                 'flights': flights,
                 'search_params': search_params,
                 'type': 'flight_search'
-            }, status=status.HTTP_200_OK)
+            }
+            _cache_search_response(cache_key, response_data, FLIGHT_SEARCH_CACHE_TTL)
+            return Response(response_data, status=status.HTTP_200_OK)
                 
         except Exception as e:
             return Response({
@@ -408,11 +611,20 @@ class ConversationListView(ListAPIView):
         limit = int(self.request.query_params.get('limit', 20))
         
         queryset = Conversation.objects.all()
-        
         if session_id:
             queryset = queryset.filter(session_id=session_id)
         
-        return queryset.order_by('-updated_at')[:limit]
+        # Counts, last timestamp and the newest message's content in a single query,
+        # as plain rows - no model instances, no metadata JSON
+        return queryset.order_by('-updated_at').annotate(
+            msg_count=Count('messages'),
+            last_ts=Max('messages__timestamp'),
+            last_content=Subquery(
+                Message.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp').values('content')[:1]
+            )
+        ).values(
+            'id', 'session_id', 'title', 'created_at', 'updated_at', 'msg_count', 'last_ts', 'last_content'
+        )[:limit]
     
     def list(self, request, *args, **kwargs):
         """Override list to provide enhanced conversation data"""
@@ -420,17 +632,16 @@ class ConversationListView(ListAPIView):
         
         conversations_data = []
         for conv in queryset:
-            summary = ConversationSearchService.get_conversation_summary(conv)
             conversation_data = {
-                'id': conv.id,
-                'session_id': conv.session_id,
-                'title': conv.title,
-                'created_at': conv.created_at,
-                'updated_at': conv.updated_at,
-                'message_count': conv.get_message_count(),
-                'last_message': conv.get_last_message().timestamp if conv.get_last_message() else None,
-                'preview': summary.get('preview', ''),
-                'url': f"/api/conversations/{conv.id}/"
+                'id': conv['id'],
+                'session_id': conv['session_id'],
+                'title': conv['title'],
+                'created_at': conv['created_at'],
+                'updated_at': conv['updated_at'],
+                'message_count': conv['msg_count'],
+                'last_message': conv['last_ts'],
+                'preview': ConversationSearchService.build_preview(conv['last_content']),
+                'url': f"/api/conversations/{conv['id']}/"
             }
             conversations_data.append(conversation_data)
         
@@ -444,6 +655,20 @@ class ConversationListView(ListAPIView):
 class TourSearchView(APIView):
     """API endpoint for direct tour search"""
     
+    # Same fields as TourSerializer
+    TOUR_FIELDS = (
+        'id', 'code', 'title', 'price', 'rating', 'review_count',
+        'duration', 'destination', 'thumbnail_url', 'viator_url',
+        'description', 'created_at'
+    )
+    
+    @staticmethod
+    def _tour_json(row: dict) -> dict:
+        """TourSerializer's output for a .values() row, built without per-field serializer calls"""
+        # DRF renders DecimalField as a string (the renderer gives datetimes the 'Z' suffix)
+        row['price'] = str(row['price'])
+        return row
+    
     def post(self, request, *args, **kwargs):
         """Search for tours using Viator API"""
         serializer = TourSearchSerializer(data=request.data)
@@ -455,58 +680,74 @@ class TourSearchView(APIView):
                 "success": False
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        cache_key = None
         try:
-            from .services.viator import ViatorService
-            
             search_params = serializer.validated_data
-            viator = ViatorService()
             
-            tours = viator.search_tours(
+            cache_key = _search_cache_key('tours', dict(search_params))
+            cached_response = _cached_search_response(cache_key)
+            if cached_response is not None:
+                logger.info("[Cache HIT] Tour search in %s", search_params['destination'])
+                return cached_response
+            
+            # Shared client - keeps its HTTP connection pool warm
+            tours = get_handlers().viator.search_tours(
                 query=search_params.get('query'),
                 destination=search_params['destination'],
                 start_date=search_params.get('date'),
                 page_size=search_params['limit']
             )
             
-            # Cache tours in database
-            cached_tours = []
-            for tour_data in tours:
-                tour, created = Tour.objects.update_or_create(
+            # Cache tours in database - one upsert statement instead of a SELECT + write per tour
+            # Last occurrence wins for duplicate codes (Postgres can't upsert a row twice per statement)
+            tours_by_code = {
+                tour_data['code']: Tour(
                     code=tour_data['code'],
-                    defaults={
-                        'title': tour_data['title'],
-                        'price': tour_data['price'],
-                        'rating': tour_data['rating'],
-                        'review_count': tour_data['reviewCount'],
-                        'duration': tour_data.get('duration', ''),
-                        'destination': search_params['destination'],
-                        'thumbnail_url': tour_data.get('thumbnail', ''),
-                        'viator_url': tour_data['url'],
-                        'updated_at': timezone.now()
-                    }
+                    title=tour_data['title'],
+                    price=tour_data['price'],
+                    rating=tour_data['rating'],
+                    review_count=tour_data['reviewCount'],
+                    duration=tour_data.get('duration', ''),
+                    destination=search_params['destination'],
+                    thumbnail_url=tour_data.get('thumbnail', ''),
+                    viator_url=tour_data['url']
                 )
-                cached_tours.append(tour)
+                for tour_data in tours
+            }
+            with transaction.atomic():
+                Tour.objects.bulk_create(
+                    tours_by_code.values(),
+                    update_conflicts=True,
+                    unique_fields=['code'],
+                    update_fields=[
+                        'title', 'price', 'rating', 'review_count', 'duration',
+                        'destination', 'thumbnail_url', 'viator_url', 'updated_at'
+                    ]
+                )
+            # Re-read for ids/created_at as plain rows, keeping the API's ordering
+            saved = {
+                row['code']: row
+                for row in Tour.objects.filter(code__in=list(tours_by_code)).values(*self.TOUR_FIELDS)
+            }
+            tours_json = [self._tour_json(saved[code]) for code in tours_by_code if code in saved]
             
-            tour_serializer = TourSerializer(cached_tours, many=True)
-            response_serializer = TourSearchResponseSerializer(data={
+            # Server-built payload - no need to run it back through a validating serializer
+            response_data = {
                 'success': True,
-                'message': f"Found {len(cached_tours)} tours",
-                'tours': tour_serializer.data,
+                'message': f"Found {len(tours_json)} tours",
+                'tours': tours_json,
                 'destination': search_params['destination'],
                 'search_params': search_params
-            })
-            
-            if response_serializer.is_valid():
-                return Response(response_serializer.validated_data, status=status.HTTP_200_OK)
-            else:
-                return Response({
-                    'success': True,
-                    'message': f"Found {len(cached_tours)} tours",
-                    'tours': tour_serializer.data,
-                    'destination': search_params['destination']
-                }, status=status.HTTP_200_OK)
+            }
+            _cache_search_response(cache_key, response_data, TOUR_SEARCH_CACHE_TTL, TOUR_SEARCH_STALE_TTL)
+            return Response(response_data, status=status.HTTP_200_OK)
                 
         except Exception as e:
+            # Better an hours-old result than an error while Viator is down
+            stale_response = _stale_search_response(cache_key) if cache_key else None
+            if stale_response is not None:
+                logger.warning("[Cache STALE] Tour search failed (%s), serving last good result", e)
+                return stale_response
             return Response({
                 'success': False,
                 'message': f"Error searching tours: {str(e)}",
@@ -522,6 +763,13 @@ class ConversationSearchView(APIView):
         query = request.query_params.get('query', '')
         session_id = request.query_params.get('session_id', '')
         limit = int(request.query_params.get('limit', 10))
+        use_cache = request.query_params.get('no_cache') != '1'
+        cache_key = _search_cache_key('convsearch', {'query': query, 'session_id': session_id, 'limit': limit})
+        
+        if use_cache:
+            cached_response = _cached_search_response(cache_key)
+            if cached_response is not None:
+                return cached_response
         
         try:
             conversations = ConversationSearchService.search_conversations(
@@ -530,23 +778,35 @@ class ConversationSearchView(APIView):
                 limit=limit
             )
             
+            # One annotated query for every summary instead of several per conversation
+            summaries = ConversationSearchService.bulk_summaries(conversations)
+            
             conversation_summaries = []
             for conv in conversations:
-                summary = ConversationSearchService.get_conversation_summary(conv)
+                summary = summaries[conv.id]
                 summary['id'] = conv.id
                 summary['created_at'] = conv.created_at
                 summary['updated_at'] = conv.updated_at
                 conversation_summaries.append(summary)
             
-            return Response({
+            response_data = {
                 'success': True,
                 'conversations': conversation_summaries,
                 'total': len(conversation_summaries),
                 'query': query,
                 'session_id': session_id
-            }, status=status.HTTP_200_OK)
+            }
+            _cache_search_response(
+                cache_key, response_data, CONVERSATION_SEARCH_CACHE_TTL, CONVERSATION_SEARCH_STALE_TTL
+            )
+            return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
+            # Database trouble - a recent result beats an error
+            stale_response = _stale_search_response(cache_key) if use_cache else None
+            if stale_response is not None:
+                logger.warning("[Cache STALE] Conversation search failed (%s), serving last good result", e)
+                return stale_response
             return Response({
                 'success': False,
                 'error': f"Error searching conversations: {str(e)}",
@@ -562,29 +822,36 @@ class ConversationDetailView(APIView):
         session_id = request.query_params.get('session_id')
         
         try:
+            # Only the columns the response uses
+            conversations = Conversation.objects.only('id', 'session_id', 'created_at', 'updated_at')
             if conversation_id:
-                conversation = Conversation.objects.get(id=conversation_id)
+                conversation = conversations.get(id=conversation_id)
             elif session_id:
-                conversation = Conversation.objects.get(session_id=session_id)
+                conversation = conversations.get(session_id=session_id)
             else:
                 return Response({
                     'success': False,
                     'error': 'Either conversation_id or session_id must be provided'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            messages = conversation.messages.all().order_by('timestamp')
-            
-            message_data = []
-            for message in messages:
-                message_data.append({
-                    'id': message.id,
-                    'type': message.message_type,
-                    'content': message.content,
-                    'timestamp': message.timestamp,
-                    'metadata': message.metadata
-                })
+            # Plain row dicts - no model instances for long histories.
+            # Kept as a list so the summary is built from the same rows instead of re-querying
+            messages = list(conversation.messages.order_by('timestamp').values(
+                'id', 'message_type', 'content', 'timestamp', 'metadata'
+            ))
+            
+            message_data = [
+                {
+                    'id': message['id'],
+                    'type': message['message_type'],
+                    'content': message['content'],
+                    'timestamp': message['timestamp'],
+                    'metadata': message['metadata']
+                }
+                for message in messages
+            ]
             
-            summary = ConversationSearchService.get_conversation_summary(conversation)
+            summary = ConversationSearchService.get_conversation_summary(conversation, messages)
             
             return Response({
                 'success': True,
@@ -614,12 +881,7 @@ class ConversationDetailView(APIView):
 def create_conversation(request):
     """Create a new conversation"""
     try:
-        new_session_id = str(uuid.uuid4())
-        
-        conversation = Conversation.objects.create(
-            session_id=new_session_id,
-            created_at=timezone.now()
-        )
+        conversation = Conversation.objects.create(session_id=new_session_id())
         
         return Response({
             'success': True,
@@ -644,13 +906,12 @@ def create_conversation(request):
 def update_conversation(request, conversation_id):
     """Update conversation title or other metadata"""
     try:
-        conversation = Conversation.objects.get(id=conversation_id)
-        
         new_title = request.data.get('title', '').strip()
         
         if new_title:
+            conversation = Conversation.objects.only('id', 'session_id').get(id=conversation_id)
             conversation.title = new_title
-            conversation.save()
+            conversation.save(update_fields=['title', 'updated_at'])
             
             return Response({
                 'success': True,
@@ -684,8 +945,10 @@ def update_conversation(request, conversation_id):
 def delete_conversation(request, conversation_id):
     """Delete a conversation and all its messages"""
     try:
-        conversation = Conversation.objects.get(id=conversation_id)
+        conversation = Conversation.objects.only('id', 'session_id').get(id=conversation_id)
         conversation.delete()
+        _executor_cache.delete(conversation.session_id)
+        cache.delete(_conversation_id_cache_key(conversation.session_id))
         
         return Response({
             'success': True,
@@ -704,26 +967,42 @@ def delete_conversation(request, conversation_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@api_view(['GET'])
+# Static part of the health payload - only the timestamp changes per probe
+_HEALTH_BASE = {
+    "status": "healthy",
+    "service": "Voya Agent API",
+    "version": "1.0.0",
+    "services": {
+        "flights": "mistifly",
+        "tours": "viator",
+        "places": "google"
+    }
+}
+
+
+# Rendered once; probes only splice in the timestamp, refreshed at most once a second
+_HEALTH_PREFIX = orjson.dumps(_HEALTH_BASE)[:-1] + b',"timestamp":"'
+_health_body = (0, b'')
+
+
+@require_GET
 def health_check(request):
-    """Health check endpoint for hosting platforms"""
-    return Response({
-        "status": "healthy",
-        "service": "Voya Agent API",
-        "timestamp": timezone.now().isoformat(),
-        "version": "1.0.0",
-        "services": {
-            "flights": "mistifly",
-            "tours": "viator",
-            "places": "google"
-        }
-    }, status=status.HTTP_200_OK)
+    """Health check endpoint for hosting platforms (plain Django view - no DRF negotiation)"""
+    global _health_body
+    second = int(time.time())
+    cached_second, body = _health_body
+    if cached_second != second:
+        timestamp = datetime.fromtimestamp(second, tz=dt_timezone.utc).isoformat()
+        body = _HEALTH_PREFIX + timestamp.encode() + b'"}'
+        _health_body = (second, body)
+    return HttpResponse(body, content_type='application/json')
 
 # agent/views.py - ADD THESE NEW VIEWS
 
 from .services.monei import get_monei_service
+from .tasks import issue_ticket_task
 from agent.models import FlightBooking, Payment, WebhookLog
-from datetime import timedelta
+from datetime import date, timedelta
 
 # ... (keep all your existing views) ...
 
@@ -740,6 +1019,8 @@ class CreateFlightBookingView(APIView):
     FIXED: Added revalidation step before booking
     """
     
+    EMAIL_RE = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+    
     def post(self, request, *args, **kwargs):
         start_time = time.time()
         
@@ -751,7 +1032,7 @@ class CreateFlightBookingView(APIView):
             passengers = request.data.get('passengers', [])
             contact_email = request.data.get('contact_email')
             contact_phone = request.data.get('contact_phone')
-            session_id = request.data.get('session_id', str(uuid.uuid4()))
+            session_id = request.data.get('session_id', new_session_id())
             
             # ✅ FIX: Allow cabin_class to be passed directly (not just in search_params)
             cabin_class = request.data.get('cabin_class', 'ECONOMY')
@@ -762,27 +1043,19 @@ class CreateFlightBookingView(APIView):
                     'message': 'Missing required fields: flight_data, passengers, contact_email, contact_phone'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            if not passengers:
-                return Response({
-                    'success': False,
-                    'message': 'At least one passenger is required'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
             # Validate email format
-            import re
-            if not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', contact_email):
+            if not self.EMAIL_RE.match(contact_email):
                 return Response({
                     'success': False,
                     'message': 'Invalid email format'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            logger.info(f"[Booking] Creating booking for {contact_email}, {len(passengers)} passenger(s)")
+            logger.info("[Booking] Creating booking for %s, %s passenger(s)", contact_email, len(passengers))
             
             # ================================================================
             # STEP 2: Extract Search Parameters (ROBUST)
             # ================================================================
-            from agent.services.mistifly import MistiflyService
-            mistifly = MistiflyService()
+            mistifly = get_handlers().mistifly
             
             # ✅ FIX: Build search_params from multiple sources with fallbacks
             search_params = flight_data.get('search_params', {})
@@ -797,11 +1070,11 @@ class CreateFlightBookingView(APIView):
             if not departure_date and flight_data.get('departure_time'):
                 # departure_time format: "2026-01-17T10:30:00"
                 departure_date = flight_data['departure_time'].split('T')[0]
-                logger.info(f"[Booking] Extracted departure_date from departure_time: {departure_date}")
+                logger.info("[Booking] Extracted departure_date from departure_time: %s", departure_date)
             
             # Validate we have required fields
             if not all([origin, destination, departure_date]):
-                logger.error(f"[Booking] Missing route info. Flight data: {flight_data.keys()}")
+                logger.error("[Booking] Missing route info. Flight data: %s", flight_data.keys())
                 return Response({
                     'success': False,
                     'message': 'Flight data missing origin, destination, or departure_date. Please search again.',
@@ -812,7 +1085,7 @@ class CreateFlightBookingView(APIView):
                     }
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            logger.info(f"[Booking] Route: {origin} -> {destination} on {departure_date}")
+            logger.info("[Booking] Route: %s -> %s on %s", origin, destination, departure_date)
             
             # ================================================================
             # STEP 3: Get Full Itinerary (if not already present)
@@ -820,9 +1093,10 @@ class CreateFlightBookingView(APIView):
             if 'raw_itinerary' not in flight_data or not flight_data['raw_itinerary']:
                 # Need to re-fetch full itinerary
                 flight_id = flight_data.get('id', 'flight_0')
-                flight_index = int(flight_id.split('_')[1]) if '_' in flight_id else 0
+                _, sep, index_part = flight_id.rpartition('_')
+                flight_index = int(index_part) if sep and index_part.isdigit() else 0
                 
-                logger.info(f"[Booking] Re-fetching full itinerary for flight {flight_index}")
+                logger.info("[Booking] Re-fetching full itinerary for flight %s", flight_index)
                 
                 try:
                     full_flight = mistifly.get_full_itinerary_for_booking(
@@ -836,7 +1110,7 @@ class CreateFlightBookingView(APIView):
                     )
                     flight_data = full_flight
                 except Exception as e:
-                    logger.error(f"[Booking] Re-fetch failed: {e}")
+                    logger.error("[Booking] Re-fetch failed: %s", e)
                     return Response({
                         'success': False,
                         'message': f"Could not retrieve flight data: {str(e)}. Please search again."
@@ -858,10 +1132,10 @@ class CreateFlightBookingView(APIView):
                 new_price = bookable_itinerary.get("AirItineraryPricingInfo", {}).get("ItinTotalFare", {}).get("TotalFare", {}).get("Amount")
                 if new_price:
                     flight_data['price'] = float(new_price)
-                    logger.info(f"[Booking] Price confirmed: {new_price}")
+                    logger.info("[Booking] Price confirmed: %s", new_price)
                     
             except Exception as e:
-                logger.error(f"[Booking] Revalidation failed: {e}")
+                logger.error("[Booking] Revalidation failed: %s", e)
                 return Response({
                     'success': False,
                     'message': f"Flight is no longer available or price has changed: {str(e)}"
@@ -889,18 +1163,17 @@ class CreateFlightBookingView(APIView):
                     'error': booking_response.get('message')
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
-            logger.info(f"[Booking] Mistifly reservation created: {mistifly_order_id}")
+            logger.info("[Booking] Mistifly reservation created: %s", mistifly_order_id)
             
             # ================================================================
             # STEP 5: Create FlightBooking Record
             # ================================================================
             # Parse departure_date to date object if it's a string
             if isinstance(departure_date, str):
-                from datetime import datetime as dt
-                departure_date = dt.strptime(departure_date, "%Y-%m-%d").date()
+                departure_date = date.fromisoformat(departure_date)
             
             if return_date and isinstance(return_date, str):
-                return_date = dt.strptime(return_date, "%Y-%m-%d").date()
+                return_date = date.fromisoformat(return_date)
             
             booking = FlightBooking.objects.create(
                 session_id=session_id,
@@ -926,7 +1199,7 @@ class CreateFlightBookingView(APIView):
                 expires_at=timezone.now() + timedelta(minutes=30)
             )
             
-            logger.info(f"[Booking] FlightBooking created: {booking.booking_id}")
+            logger.info("[Booking] FlightBooking created: %s", booking.booking_id)
             
             # ================================================================
             # STEP 6: Create Monei Payment
@@ -943,28 +1216,27 @@ class CreateFlightBookingView(APIView):
                     customer_phone=contact_phone
                 )
                 
-                # Update booking with payment info
+                # Link the payment and record it together - skip rewriting raw_itinerary/passengers
                 booking.payment_intent_id = payment_result['payment_id']
                 booking.payment_url = payment_result['checkout_url']
-                booking.save()
-                
-                # Create Payment record
-                Payment.objects.create(
-                    booking=booking,
-                    monei_payment_id=payment_result['payment_id'],
-                    amount=booking.total_amount,
-                    currency=booking.currency,
-                    status='PENDING'
-                )
+                with transaction.atomic():
+                    booking.save(update_fields=['payment_intent_id', 'payment_url', 'updated_at'])
+                    Payment.objects.create(
+                        booking=booking,
+                        monei_payment_id=payment_result['payment_id'],
+                        amount=booking.total_amount,
+                        currency=booking.currency,
+                        status='PENDING'
+                    )
                 
-                logger.info(f"[Booking] Payment created: {payment_result['payment_id']}")
+                logger.info("[Booking] Payment created: %s", payment_result['payment_id'])
                 
             except Exception as e:
-                logger.error(f"[Booking] Payment creation failed: {e}")
+                logger.error("[Booking] Payment creation failed: %s", e)
                 return Response({
                     'success': False,
                     'message': f"Booking created but payment setup failed: {str(e)}",
-                    'booking_id': str(booking.booking_id),
+                    'booking_id': booking.booking_id,
                     'can_retry': True
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
@@ -977,13 +1249,13 @@ class CreateFlightBookingView(APIView):
                 'success': True,
                 'message': 'Booking created successfully! Complete payment to confirm.',
                 'booking': {
-                    'booking_id': str(booking.booking_id),
+                    'booking_id': booking.booking_id,
                     'mistifly_order_id': booking.mistifly_order_id,
                     'pnr': booking.pnr,
                     'origin': booking.origin,
                     'destination': booking.destination,
-                    'departure_date': booking.departure_date.isoformat(),
-                    'return_date': booking.return_date.isoformat() if booking.return_date else None,
+                    'departure_date': booking.departure_date,
+                    'return_date': booking.return_date,
                     'passengers': booking.num_passengers,
                     'total_amount': float(booking.total_amount),
                     'currency': booking.currency,
@@ -1006,13 +1278,13 @@ class CreateFlightBookingView(APIView):
                 'duration_ms': int(duration * 1000)
             }
             
-            logger.info(f"[Booking] Complete! Duration: {duration*1000:.0f}ms")
+            logger.info("[Booking] Complete! Duration: %.0fms", duration*1000)
             
             return Response(response_data, status=status.HTTP_201_CREATED)
             
         except Exception as e:
             duration = time.time() - start_time
-            logger.error(f"[Booking] Error after {duration*1000:.0f}ms: {e}", exc_info=True)
+            logger.error("[Booking] Error after %.0fms: %s", duration*1000, e, exc_info=True)
             return Response({
                 'success': False,
                 'message': f"Booking creation failed: {str(e)}"
@@ -1028,26 +1300,29 @@ class BookingStatusView(APIView):
     def get(self, request, booking_id, *args, **kwargs):
         """Get current booking status"""
         try:
-            booking = FlightBooking.objects.get(booking_id=booking_id)
+            # The itinerary/passenger JSON is never read here - skip loading it
+            booking = FlightBooking.objects.defer('raw_itinerary', 'passengers').get(booking_id=booking_id)
             
             # Check if expired
             is_expired = booking.is_expired()
             if is_expired and booking.payment_status == 'PENDING':
                 booking.payment_status = 'EXPIRED'
-                booking.save()
+                booking.save(update_fields=['payment_status', 'updated_at'])
+            # Same check as can_be_paid(), reusing the expiry result instead of re-reading the clock
+            can_pay = booking.payment_status == 'PENDING' and not is_expired
             
             response_data = {
                 'success': True,
                 'booking': {
-                    'booking_id': str(booking.booking_id),
+                    'booking_id': booking.booking_id,
                     'pnr': booking.pnr,
                     'origin': booking.origin,
                     'destination': booking.destination,
                     'payment_status': booking.payment_status,
                     'ticket_status': booking.ticket_status,
                     'is_expired': is_expired,
-                    'can_pay': booking.can_be_paid(),
-                    'payment_url': booking.payment_url if booking.can_be_paid() else None,
+                    'can_pay': can_pay,
+                    'payment_url': booking.payment_url if can_pay else None,
                     'total_amount': float(booking.total_amount),
                     'currency': booking.currency,
                     'expires_at': booking.expires_at.isoformat(),
@@ -1066,7 +1341,7 @@ class BookingStatusView(APIView):
                 'message': 'Booking not found'
             }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"[Booking Status] Error: {e}")
+            logger.error("[Booking Status] Error: %s", e)
             return Response({
                 'success': False,
                 'message': f"Error retrieving booking: {str(e)}"
@@ -1082,7 +1357,8 @@ class RetryPaymentView(APIView):
     def post(self, request, booking_id, *args, **kwargs):
         """Retry payment for a booking"""
         try:
-            booking = FlightBooking.objects.get(booking_id=booking_id)
+            # The itinerary/passenger JSON is never read here - skip loading it
+            booking = FlightBooking.objects.defer('raw_itinerary', 'passengers').get(booking_id=booking_id)
             
             # Validate booking can be paid
             if not booking.can_be_paid():
@@ -1103,19 +1379,18 @@ class RetryPaymentView(APIView):
                 customer_phone=booking.contact_phone
             )
             
-            # Update booking
+            # Link the payment and record it together - skip rewriting raw_itinerary/passengers
             booking.payment_intent_id = payment_result['payment_id']
             booking.payment_url = payment_result['checkout_url']
-            booking.save()
-            
-            # Create new Payment record
-            Payment.objects.create(
-                booking=booking,
-                monei_payment_id=payment_result['payment_id'],
-                amount=booking.total_amount,
-                currency=booking.currency,
-                status='PENDING'
-            )
+            with transaction.atomic():
+                booking.save(update_fields=['payment_intent_id', 'payment_url', 'updated_at'])
+                Payment.objects.create(
+                    booking=booking,
+                    monei_payment_id=payment_result['payment_id'],
+                    amount=booking.total_amount,
+                    currency=booking.currency,
+                    status='PENDING'
+                )
             
             return Response({
                 'success': True,
@@ -1130,7 +1405,7 @@ class RetryPaymentView(APIView):
                 'message': 'Booking not found'
             }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            logger.error(f"[Retry Payment] Error: {e}")
+            logger.error("[Retry Payment] Error: %s", e)
             return Response({
                 'success': False,
                 'message': f"Error generating payment link: {str(e)}"
@@ -1140,7 +1415,6 @@ class RetryPaymentView(APIView):
 
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import json
 
 @method_decorator(csrf_exempt, name='dispatch')
 class MoneiWebhookView(APIView):
@@ -1151,6 +1425,8 @@ class MoneiWebhookView(APIView):
     CRITICAL: This endpoint processes payments and issues tickets.
     """
     
+    PROCESSED_EVENT_TTL = 86400  # MONEI stops retrying well within a day
+    
     def post(self, request, *args, **kwargs):
         start_time = time.time()
         
@@ -1166,15 +1442,16 @@ class MoneiWebhookView(APIView):
             
             # Use the secure verification method from the service
             if not monei.verify_webhook_signature(payload, signature):
-                logger.warning(f"[Webhook] Invalid signature received from IP: {request.META.get('REMOTE_ADDR')}")
+                logger.warning("[Webhook] Invalid signature received from IP: %s", request.META.get('REMOTE_ADDR'))
                 return Response({'success': False, 'message': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
             
             # ================================================================
             # 2. PARSE DATA
             # ================================================================
             try:
-                webhook_data = json.loads(payload.decode('utf-8'))
-            except json.JSONDecodeError:
+                # Parse the verified bytes directly - no intermediate str copy
+                webhook_data = orjson.loads(payload)
+            except orjson.JSONDecodeError:
                 return Response({'success': False, 'message': 'Invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
             
             event_type = webhook_data.get('type')
@@ -1187,104 +1464,110 @@ class MoneiWebhookView(APIView):
             # ================================================================
             # 3. IDEMPOTENCY CHECK
             # ================================================================
-            if WebhookLog.objects.filter(monei_event_id=monei_event_id, processed=True).exists():
+            # Redis first - replays of processed events never reach Postgres
+            processed_key = f"monei_event:{monei_event_id}" if monei_event_id else None
+            if processed_key and cache.get(processed_key):
+                return Response({'success': True, 'message': 'Already processed'}, status=status.HTTP_200_OK)
+
+            # One lookup serves both the check and a retried (unprocessed) delivery
+            log_entry = (
+                WebhookLog.objects.filter(monei_event_id=monei_event_id)
+                .only('webhook_id', 'processed')
+                .order_by('-processed')
+                .first()
+            ) if monei_event_id else None
+            if log_entry is not None and log_entry.processed:
                 return Response({'success': True, 'message': 'Already processed'}, status=status.HTTP_200_OK)
 
             # ================================================================
             # 4. FIND BOOKING
             # ================================================================
             try:
-                booking = FlightBooking.objects.get(booking_id=order_id)
+                # Handlers never read the itinerary/passenger JSON - don't load it
+                booking = FlightBooking.objects.defer('raw_itinerary', 'passengers').get(booking_id=order_id)
             except FlightBooking.DoesNotExist:
-                logger.error(f"[Webhook] Booking {order_id} not found.")
+                logger.error("[Webhook] Booking %s not found.", order_id)
                 # Return 200 OK to stop MONEI from retrying dead webhooks
                 return Response({'success': True, 'message': 'Booking not found'}, status=status.HTTP_200_OK)
 
             # ================================================================
             # 5. CREATE LOG & PROCESS
             # ================================================================
-            # Create log entry (unprocessed)
-            log_entry = WebhookLog.objects.create(
-                booking=booking,
-                monei_event_id=monei_event_id,
-                event_type=event_type,
-                payload=webhook_data,
-                signature=signature
-            )
+            # Create log entry (unprocessed) unless MONEI is retrying one we already logged
+            if log_entry is None:
+                log_entry = WebhookLog.objects.create(
+                    booking=booking,
+                    monei_event_id=monei_event_id,
+                    event_type=event_type,
+                    payload=webhook_data,
+                    signature=signature
+                )
 
-            # Process Event
+            # Process Event - one timestamp for every write this webhook makes
+            now = timezone.now()
             if event_type == 'payment.succeeded':
-                self._handle_payment_success(booking, payment_data)
+                self._handle_payment_success(booking, payment_data, now)
             elif event_type == 'payment.failed':
-                self._handle_payment_failure(booking, payment_data)
+                self._handle_payment_failure(booking, payment_data, now)
             elif event_type == 'payment.canceled' or event_type == 'payment.cancelled':
-                self._handle_payment_cancelled(booking, payment_data)
+                self._handle_payment_cancelled(booking, payment_data, now)
             else:
-                logger.warning(f"[Webhook] Unhandled event type: {event_type}")
+                logger.warning("[Webhook] Unhandled event type: %s", event_type)
             
             # Mark Processed
             log_entry.processed = True
-            log_entry.processed_at = timezone.now()
-            log_entry.save()
+            log_entry.processed_at = now
+            log_entry.save(update_fields=['processed', 'processed_at'])
+            # Only marked once processed, so a delivery that failed is still retried
+            if processed_key:
+                cache.set(processed_key, 1, timeout=self.PROCESSED_EVENT_TTL)
 
             duration = time.time() - start_time
-            logger.info(f"[Webhook] Processed {event_type} in {duration*1000:.0f}ms")
+            logger.info("[Webhook] Processed %s in %.0fms", event_type, duration*1000)
 
             return Response({'success': True}, status=status.HTTP_200_OK)
 
         except Exception as e:
-            logger.error(f"[Webhook] System Error: {e}", exc_info=True)
+            logger.error("[Webhook] System Error: %s", e, exc_info=True)
             # Return 500 to tell MONEI to retry later (standard behavior)
             return Response({'success': False}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _handle_payment_success(self, booking, payment_data):
+    def _handle_payment_success(self, booking, payment_data, now):
         """Handle successful payment - Mark Paid & Attempt Ticketing"""
-        logger.info(f"[Webhook] Payment SUCCESS for booking {booking.booking_id}")
+        logger.info("[Webhook] Payment SUCCESS for booking %s", booking.booking_id)
         
         transaction_id = payment_data.get('id')
         payment_method = payment_data.get('paymentMethod', {}).get('type', 'card')
         
-        # 1. Update DB to PAID immediately
-        booking.mark_as_paid(transaction_id, payment_method)
-        
-        # Update Payment Record
-        Payment.objects.filter(booking=booking, monei_payment_id=transaction_id).update(
-            status='SUCCEEDED',
-            monei_transaction_id=transaction_id,
-            payment_method=payment_method,
-            webhook_received_at=timezone.now()
-        )
+        # 1. Update DB to PAID immediately (booking + payment record commit together)
+        with transaction.atomic():
+            # Flag ticketing as in progress in the same UPDATE that marks it paid
+            booking.ticket_status = 'ISSUING'
+            booking.mark_as_paid(transaction_id, payment_method, paid_at=now, extra_fields=['ticket_status'])
+            
+            # Update Payment Record - only if the payment belongs to this booking
+            Payment.objects.filter(booking=booking, monei_payment_id=transaction_id).update(
+                status='SUCCEEDED',
+                monei_transaction_id=transaction_id,
+                payment_method=payment_method,
+                webhook_received_at=now
+            )
         
-        # 2. Attempt Ticketing (Wrapped in Try/Except to protect Payment Status)
+        # 2. Queue Ticketing - MONEI gets its 200 OK without waiting on Mistifly
         try:
-            from agent.services.mistifly import MistiflyService
-            mistifly = MistiflyService()
-            
-            logger.info(f"[Webhook] Issuing ticket for order {booking.mistifly_order_id}")
-            ticket_result = mistifly.issue_ticket(booking.mistifly_order_id)
-            
-            booking.mark_as_ticketed(ticket_result.get('ticket_numbers', []))
-            
-            if ticket_result.get('airline_pnr'):
-                booking.airline_pnr = ticket_result['airline_pnr']
-                booking.save()
-                
-            logger.info(f"[Webhook] Ticket issued: {ticket_result.get('ticket_numbers')}")
-            
+            issue_ticket_task.delay(str(booking.booking_id))
+            logger.info("[Webhook] Ticketing queued for order %s", booking.mistifly_order_id)
         except Exception as e:
-            # CRITICAL: Do NOT raise error here. The user has paid. 
-            # We must return 200 OK to MONEI and handle ticketing manually.
-            logger.error(f"[Ticketing] Failed for booking {booking.booking_id}: {e}")
-            booking.ticket_status = 'FAILED'
-            booking.notes = f"PAID BUT TICKET FAILED: {str(e)}"
-            booking.save()
-
-    def _handle_payment_failure(self, booking, payment_data):
+            # Broker unavailable - ticket inline rather than lose it (the task handles its own failures)
+            logger.error("[Webhook] Could not queue ticketing (%s), issuing inline", e)
+            issue_ticket_task.apply(args=[str(booking.booking_id)])
+
+    def _handle_payment_failure(self, booking, payment_data, now):
         """Handle failed payment"""
-        logger.info(f"[Webhook] Payment FAILED for booking {booking.booking_id}")
+        logger.info("[Webhook] Payment FAILED for booking %s", booking.booking_id)
         
         booking.payment_status = 'FAILED'
-        booking.save()
+        booking.save(update_fields=['payment_status', 'updated_at'])
         
         error_code = payment_data.get('error', {}).get('code', '')
         error_message = payment_data.get('error', {}).get('message', 'Payment failed')
@@ -1293,17 +1576,17 @@ class MoneiWebhookView(APIView):
             status='FAILED',
             error_code=error_code,
             error_message=error_message,
-            webhook_received_at=timezone.now()
+            webhook_received_at=now
         )
 
-    def _handle_payment_cancelled(self, booking, payment_data):
+    def _handle_payment_cancelled(self, booking, payment_data, now):
         """Handle cancelled payment"""
-        logger.info(f"[Webhook] Payment CANCELLED for booking {booking.booking_id}")
+        logger.info("[Webhook] Payment CANCELLED for booking %s", booking.booking_id)
         
         booking.payment_status = 'CANCELLED'
-        booking.save()
+        booking.save(update_fields=['payment_status', 'updated_at'])
         
         Payment.objects.filter(booking=booking, monei_payment_id=payment_data.get('id')).update(
             status='CANCELLED',
-            webhook_received_at=timezone.now()
+            webhook_received_at=now
         )
\ No newline at end of file
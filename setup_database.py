@@ -23,9 +23,8 @@ def setup_database():
     print("Setting up Voya Agent database...")
     
     try:
-        # Check database connection
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
+        # Check database connection (connects without running a query)
+        connection.ensure_connection()
         print("✓ Database connection successful")
         
         # Run migrations
@@ -33,33 +32,23 @@ def setup_database():
         call_command('migrate', verbosity=2, interactive=False)
         print("✓ Migrations completed successfully")
         
-        # Check if tables exist
-        with connection.cursor() as cursor:
-            # Check database type and query tables accordingly
-            if 'sqlite' in connection.vendor:
-                cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-                tables = cursor.fetchall()
-                table_names = [table[0] for table in tables]
-            else:
-                # PostgreSQL
-                cursor.execute("SELECT tablename FROM pg_tables WHERE schemaname = 'public';")
-                tables = cursor.fetchall()
-                table_names = [table[0] for table in tables]
-            
-            required_tables = [
-                'agent_conversation',
-                'agent_message', 
-                'agent_tour'
-            ]
-            
-            missing_tables = [table for table in required_tables if table not in table_names]
+        # Check if tables exist (backend-agnostic introspection)
+        table_names = set(connection.introspection.table_names())
+        
+        required_tables = [
+            'agent_conversation',
+            'agent_message', 
+            'agent_tour'
+        ]
+        
+        missing_tables = [table for table in required_tables if table not in table_names]
+        
+        if missing_tables:
+            print(f"⚠ Warning: Missing tables: {missing_tables}")
+            return False
+        else:
+            print("✓ All required tables exist")
             
-            if missing_tables:
-                print(f"⚠ Warning: Missing tables: {missing_tables}")
-                return False
-            else:
-                print("✓ All required tables exist")
-                
         print("✓ Database setup completed successfully!")
         return True
         
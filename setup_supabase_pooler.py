@@ -5,35 +5,93 @@ This script helps you configure your Supabase session pooler connection
 """
 
 import os
+import re
 import sys
 
+# https://<project-ref>.supabase.co - anything else falls back to asking for the ref
+_PROJECT_URL_RE = re.compile(r'^https?://([a-z0-9]+)\.supabase\.co/?$')
+
+# Fixed console text, written in one go
+_INTRO = """Setting up Supabase Session Pooler configuration...
+
+📋 You'll need these values from your Supabase project:
+1. Go to https://supabase.com/dashboard
+2. Select your project
+3. Go to Settings > Database
+4. Scroll down to 'Connection Pooling' section
+5. Copy the Session mode connection details
+
+"""
+
+_OUTRO = """
+🔧 Next steps:
+1. Make sure your Supabase session pooler is enabled
+2. Run: python setup_database.py
+3. Test your API endpoints
+
+⚠️  Important notes:
+- Session pooler uses port {port}, not 5432
+- Make sure 'Session mode' is enabled in Supabase dashboard
+- This is different from direct database connection
+"""
+
+
+def _db_env_entries(db_password, host, port):
+    """The DB_* .env lines this script owns, keyed by variable name (in file order)"""
+    return {
+        'DB_USER': "DB_USER=postgres\n",
+        'DB_PASSWORD': f"DB_PASSWORD={db_password}\n",
+        'DB_HOST': f"DB_HOST={host}\n",
+        'DB_PORT': f"DB_PORT={port}\n",
+        'DB_NAME': "DB_NAME=postgres\n",
+    }
+
+
+def _read_answers():
+    """
+    Non-interactive mode (--stdin or VOYA_NONINTERACTIVE=1): all answers in one
+    stdin read as PROJECT_URL=/PROJECT_REF=/DB_PASSWORD= lines. None when interactive.
+    """
+    if '--stdin' not in sys.argv[1:] and os.environ.get('VOYA_NONINTERACTIVE') != '1':
+        return None
+    answers = {}
+    for line in sys.stdin.read().splitlines():
+        key, sep, value = line.partition('=')
+        if sep:
+            answers[key.strip()] = value
+    return answers
+
+
+def _ask(prompt, answers, key):
+    """Answer from the stdin block when running non-interactively, else prompt for it"""
+    if answers is not None:
+        return answers.get(key, '').strip()
+    return input(prompt).strip()
+
+
 def setup_supabase_pooler():
     """Set up environment variables for Supabase session pooler"""
-    print("Setting up Supabase Session Pooler configuration...")
-    print("\n📋 You'll need these values from your Supabase project:")
-    print("1. Go to https://supabase.com/dashboard")
-    print("2. Select your project")
-    print("3. Go to Settings > Database")
-    print("4. Scroll down to 'Connection Pooling' section")
-    print("5. Copy the Session mode connection details\n")
+    answers = _read_answers()
+    sys.stdout.write(_INTRO)
     
     # Get Supabase session pooler connection details
-    project_url = input("Enter your Supabase project URL (e.g., https://xxxxx.supabase.co): ").strip()
+    project_url = _ask("Enter your Supabase project URL (e.g., https://xxxxx.supabase.co): ", answers, 'PROJECT_URL')
     if not project_url:
         print("❌ Project URL is required")
         return False
     
     # Extract project reference from URL
-    if '.supabase.co' in project_url:
-        project_ref = project_url.replace('https://', '').replace('.supabase.co', '')
+    match = _PROJECT_URL_RE.match(project_url)
+    if match:
+        project_ref = match.group(1)
     else:
-        project_ref = input("Enter your Supabase project reference: ").strip()
+        project_ref = _ask("Enter your Supabase project reference: ", answers, 'PROJECT_REF')
     
     if not project_ref:
         print("❌ Project reference is required")
         return False
     
-    db_password = input("Enter your database password: ").strip()
+    db_password = _ask("Enter your database password: ", answers, 'DB_PASSWORD')
     if not db_password:
         print("❌ Database password is required")
         return False
@@ -41,49 +99,58 @@ def setup_supabase_pooler():
     # Session pooler uses port 6543, not 5432
     host = f"db.{project_ref}.supabase.co"
     port = "6543"  # Session pooler port
+    db_entries = _db_env_entries(db_password, host, port)
     
     print(f"\n📋 Your environment variables should be:")
-    print(f"DB_USER=postgres")
-    print(f"DB_PASSWORD={db_password}")
-    print(f"DB_HOST={host}")
-    print(f"DB_PORT={port}")
-    print(f"DB_NAME=postgres")
+    print("".join(db_entries.values()), end="")
     
     # Create/update .env file
     env_file = '.env'
-    env_content = []
-    
-    # Read existing .env file if it exists
-    if os.path.exists(env_file):
-        with open(env_file, 'r') as f:
-            env_content = f.readlines()
-    
-    # Remove existing DB_* variables if present
-    env_content = [line for line in env_content if not any(line.startswith(prefix) for prefix in ['DB_USER=', 'DB_PASSWORD=', 'DB_HOST=', 'DB_PORT=', 'DB_NAME='])]
+    if os.environ.get('VOYA_SKIP_ENV_WRITE'):
+        # e.g. container builds with a read-only .env mount - don't touch the filesystem at all
+        print(f"⏭️  VOYA_SKIP_ENV_WRITE is set - not writing {env_file}")
+        sys.stdout.write(_OUTRO.format(port=port))
+        return True
+
+    current = b''
     
-    # Add new DB variables
-    env_content.extend([
-        f"DB_USER=postgres\n",
-        f"DB_PASSWORD={db_password}\n",
-        f"DB_HOST={host}\n",
-        f"DB_PORT={port}\n",
-        f"DB_NAME=postgres\n"
-    ])
+    # Read existing .env file if it exists (open() is the existence check - no separate stat).
+    # Bytes in, bytes out: no text-mode decode or newline translation, and CRLF files keep their endings
+    try:
+        with open(env_file, 'rb') as f:
+            current = f.read()
+    except FileNotFoundError:
+        pass
+    env_content = current.splitlines(keepends=True)
     
-    # Write updated .env file
-    with open(env_file, 'w') as f:
-        f.writelines(env_content)
+    # Parse once: lines keyed by variable name (comments/blank lines by position), in file order
+    env = {}
+    for index, line in enumerate(env_content):
+        if not line.endswith(b'\n'):
+            line += b'\n'  # don't glue the next entry onto an unterminated last line
+        key, sep, _ = line.partition(b'=')
+        if sep and not line.lstrip().startswith(b'#'):
+            env[key.strip()] = line
+        else:
+            env[index] = line
     
-    print(f"✅ Updated {env_file} with your Supabase session pooler configuration")
-    print("\n🔧 Next steps:")
-    print("1. Make sure your Supabase session pooler is enabled")
-    print("2. Run: python setup_database.py")
-    print("3. Test your API endpoints")
+    # Set DB variables - existing keys are replaced in place, new ones appended (encoded once)
+    env.update({key.encode(): line.encode('utf-8') for key, line in db_entries.items()})
     
-    print(f"\n⚠️  Important notes:")
-    print(f"- Session pooler uses port {port}, not 5432")
-    print(f"- Make sure 'Session mode' is enabled in Supabase dashboard")
-    print(f"- This is different from direct database connection")
+    new_content = b"".join(env.values())
+    if new_content == current:
+        # Same inputs as last run - leave the file (and anything watching it) alone
+        print(f"✅ {env_file} already up to date")
+    else:
+        # Write updated .env file in one go - to a temp file, then atomically swapped in,
+        # so a crash mid-write can't leave a truncated .env behind
+        tmp_file = env_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(new_content)
+        os.replace(tmp_file, env_file)
+        
+        print(f"✅ Updated {env_file} with your Supabase session pooler configuration")
+    sys.stdout.write(_OUTRO.format(port=port))
     
     return True
 
@@ -0,0 +1,12 @@
+# voya_agent/celery.py
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'voya_agent.settings')
+
+app = Celery('voya_agent')
+
+# All CELERY_* settings live in settings.py
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -130,7 +130,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'agent.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -180,7 +180,10 @@ DATABASES = {
         'OPTIONS': {
             'sslmode': 'require',
         },
-        'CONN_MAX_AGE': 600,
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,  # drop connections the pooler closed instead of erroring on first use
+        # Port 6543 is pgbouncer transaction mode - server-side cursors (.iterator()) don't survive it
+        'DISABLE_SERVER_SIDE_CURSORS': True,
     }
 }
 
@@ -259,8 +262,11 @@ CACHES = {
             },
             'SOCKET_CONNECT_TIMEOUT': 5,
             'SOCKET_TIMEOUT': 5,
+            # Responses are JSON-shaped; msgpack beats pickle on size and speed for them
+            'SERIALIZER': 'agent.cache_serializers.MsgpackSerializer',
         },
         'KEY_PREFIX': 'voya',  # Prefix all cache keys with 'voya:'
+        'VERSION': 2,  # Bumped with the msgpack switch so old pickled entries are never read
         'TIMEOUT': 60 * 30,  # Default timeout: 30 minutes
     },
     # Separate cache for sessions (optional but recommended)
@@ -281,6 +287,8 @@ CACHES = {
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
             'PASSWORD': REDIS_PASSWORD,
+            # Large JSON payloads (tour pages, destinations) shrink well; tiny values are left as-is
+            'COMPRESSOR': 'django_redis.compressors.zlib.ZlibCompressor',
         },
         'KEY_PREFIX': 'voya_api',
         'TIMEOUT': 60 * 5,  # 5 minutes for API responses